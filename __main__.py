@@ -1,14 +1,9 @@
 from base import *
-import json
+from loader import loadUITreeNodeFromFile
 
 base1='sample.json'
 base2withimage='eve-online-memory-reading-8ae367ddee.json'
-with open(base2withimage) as fp:
-  data = json.load(fp)
-
-print("Entries: ", len(data))
-
-u: UITreeNode = UITreeNode.fromJson(data)
+u: UITreeNode = loadUITreeNodeFromFile(base2withimage, dictEntriesProjection())
 print(u.dictEntriesOfInterest, u.pythonObjectAddress, u.pythonObjectTypeName)
 
 
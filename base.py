@@ -16,17 +16,21 @@
 
 from math import pi
 from classes import *
-from typing import Callable, Tuple
+from typing import Callable, Hashable, Iterable, Iterator, NamedTuple, Tuple
 from helpers import *
 from copy import copy
+from uitreestore import NO_ROW, UITreeStoreNode, UITreeStoreNodeWithDisplayRegion
+from uitreeindex import NO_POSITION, UITreeIndex
+from uiselector import querySelector, querySelectorAll, querySelectorsAll
+from parsecache import ParseResultCache
 
 from pprint import pprint
 
 
-def parseUITreeWithDisplayRegionFromUITree(uiTree: UITreeNode) -> UITreeNodeWithDisplayRegion:
+def parseUITreeWithDisplayRegionFromUITree(uiTree: UITreeNode, lazy: bool = False) -> UITreeNodeWithDisplayRegion:
     selfDisplayRegion = getDisplayRegionFromDictEntries(
         uiTree) or DisplayRegion(**{'x': 0, 'y': 0, 'width': 0, 'height': 0})
-    return asUITreeNodeWithDisplayRegion(selfDisplayRegion, selfDisplayRegion, uiTree)
+    return asUITreeNodeWithDisplayRegion(selfDisplayRegion, selfDisplayRegion, uiTree, lazy)
 # parseUITreeWithDisplayRegionFromUITree : UITreeNode -> UITreeNodeWithDisplayRegion
 # parseUITreeWithDisplayRegionFromUITree uiTree =
 #     let
@@ -40,30 +44,32 @@ def parseUITreeWithDisplayRegionFromUITree(uiTree: UITreeNode) -> UITreeNodeWith
 #             }
 
 
-def parseUserinterfaceFromUITree(uiTree: UITreeNodeWithDisplayRegion) -> ParsedUserInterface:
+def parseUserinterfaceFromUITree(uiTree: UITreeNodeWithDisplayRegion, lazy: bool = False, cache: Optional['UIRootParseCache'] = None) -> ParsedUserInterface:
+    # Pass the same UIRootParseCache for consecutive frames of one client to
+    #  reuse the parsed windows that did not change.
+    if cache is not None:
+        cache.beginFrame()
+    if lazy:
+        # Fields are parsed on first access, see LazyParsedUserInterface.
+        return LazyParsedUserInterface(uiTree=uiTree, _parseCache=cache)
     x = ParsedUserInterface()
     x.uiTree = uiTree
+    # Context menus are found among the children of the root, no walk needed.
     x.contextMenus = parseContextMenusFromUITreeRoot(uiTree)
-    x.shipUI = parseShipUIFromUITreeRoot(uiTree)
-    x.targets = parseTargetsFromUITreeRoot(uiTree)
-    # x.infoPanelContainer = parseInfoPanelContainerFromUIRoot(uiTree)
-    x.overviewWindow = parseOverviewWindowFromUITreeRoot(uiTree)
-    x.selectedItemWindow = parseSelectedItemWindowFromUITreeRoot(uiTree)
-    x.dronesWindow = parseDronesWindowFromUITreeRoot(uiTree)
+    # The window parsers registered with registerUIRootParser (shipUI, targets,
+    #  infoPanelContainer, overviewWindow, selectedItemWindow, dronesWindow,
+    #  probeScannerWindow, directionalScannerWindow, stationWindow,
+    #  moduleButtonTooltip, chatWindowStacks, bookmarkLocationWindow) share
+    #  one pass to find their root nodes.
+    rootNodes = collectUIRootNodes(uiTree)
+    for parser in _uiRootParsers:
+        setattr(x, parser.field, parseUIRootField(parser, rootNodes[parser.field], cache))
     # x.fittingWindow = parseFittingWindowFromUITreeRoot(uiTree)
-    x.probeScannerWindow = parseProbeScannerWindowFromUITreeRoot(uiTree)
-    x.directionalScannerWindow = parseDirectionalScannerWindowFromUITreeRoot(
-        uiTree)
-    x.stationWindow = parseStationWindowFromUITreeRoot(uiTree)
     # x.inventoryWindows = parseInventoryWindowsFromUITreeRoot(uiTree)
-    x.moduleButtonTooltip = parseModuleButtonTooltipFromUITreeRoot(uiTree)
-    x.chatWindowStacks = parseChatWindowStacksFromUITreeRoot(uiTree)
     # x.agentConversationWindows = parseAgentConversationWindowsFromUITreeRoot(
     #     uiTree)
     # x.marketOrdersWindow = parseMarketOrdersWindowFromUITreeRoot(uiTree)
     # x.surveyScanWindow = parseSurveyScanWindowFromUITreeRoot(uiTree)
-    x.bookmarkLocationWindow = parseBookmarkLocationWindowFromUITreeRoot(
-        uiTree)
     # x.repairShopWindow = parseRepairShopWindowFromUITreeRoot(uiTree)
     # x.characterSheetWindow = parseCharacterSheetWindowFromUITreeRoot(uiTree)
     # x.fleetWindow = parseFleetWindowFromUITreeRoot(uiTree)
@@ -109,6 +115,191 @@ def parseUserinterfaceFromUITree(uiTree: UITreeNodeWithDisplayRegion) -> ParsedU
 #     , keyActivationWindow = parseKeyActivationWindowFromUITreeRoot uiTree
 #     }
 
+class LazyParsedUserInterface(ParsedUserInterface):
+    # The fields parseUserinterfaceFromUITree fills, each parsed when it is
+    #  first read and then stored on the instance, so later reads in the same
+    #  frame do not reach __getattr__ again.
+    def __getattr__(self, name: str) -> Any:
+        uiTree = self.__dict__.get('uiTree')
+        if uiTree is None or name.startswith('_'):
+            raise AttributeError(name)
+        if name == 'contextMenus':
+            value = parseContextMenusFromUITreeRoot(uiTree)
+        else:
+            parser = next((x for x in _uiRootParsers if x.field == name), None)
+            if parser is None:
+                raise AttributeError(name)
+            if getattr(uiTree, 'treeIndex', None) is not None:
+                nodes = collectUIRootNodes(uiTree, [parser])[name]
+            else:
+                # Without an index the root nodes of all fields are gathered in
+                #  one walk on the first read and shared by the later ones.
+                rootNodes = self.__dict__.get('_rootNodes')
+                if rootNodes is None:
+                    rootNodes = self._rootNodes = collectUIRootNodes(uiTree)
+                nodes = rootNodes[name]
+            value = parseUIRootField(parser, nodes, self.__dict__.get('_parseCache'))
+        setattr(self, name, value)
+        return value
+
+
+class UIRootParser(NamedTuple):
+    field: str
+    pythonObjectTypeNames: Tuple[str, ...]
+    # Gets all nodes of those types below the root, in document order.
+    fromNodes: Callable[[List[UITreeNodeWithDisplayRegion]], Any]
+
+
+# Window parsers of parseUserinterfaceFromUITree, in registration order. Each
+#  names the ParsedUserInterface field it fills and the types of the root nodes
+#  it starts from, so one pass over the tree can serve all of them.
+_uiRootParsers: List[UIRootParser] = []
+
+
+def registerUIRootParser(field: str, pythonObjectTypeNames: Iterable[str], fromNodes: Callable[[List[UITreeNodeWithDisplayRegion]], Any]) -> None:
+    _uiRootParsers.append(UIRootParser(field, tuple(pythonObjectTypeNames), fromNodes))
+
+
+class PerNodeParser(NamedTuple):
+    # fromNodes of a field parsed from one root node at a time, either the
+    #  first one found or each of them. UIRootParseCache reuses the results
+    #  per node.
+    parse: Callable[[UITreeNodeWithDisplayRegion], Any]
+    firstOnly: bool
+
+    def __call__(self, nodes: List[UITreeNodeWithDisplayRegion]) -> Any:
+        if self.firstOnly:
+            return self.parse(nodes[0]) if len(nodes) > 0 else None
+        return [self.parse(x) for x in nodes]
+
+
+def firstNodeParser(parse: Callable[[UITreeNodeWithDisplayRegion], Any]) -> Callable[[List[UITreeNodeWithDisplayRegion]], Any]:
+    return PerNodeParser(parse, True)
+
+
+def allNodesParser(parse: Callable[[UITreeNodeWithDisplayRegion], Any]) -> Callable[[List[UITreeNodeWithDisplayRegion]], List[Any]]:
+    return PerNodeParser(parse, False)
+
+
+def uiSubtreeContentKey(node: UITreeNodeWithDisplayRegion) -> Tuple:
+    # Changes whenever anything a parser can read below node changes: the
+    #  subtree hash of the raw node, which covers children without a display
+    #  region too, and the position of node on screen, which all the
+    #  descendant regions are relative to.
+    region = node.totalDisplayRegion
+    return (region.x, region.y, region.width, region.height, uiTreeNodeSubtreeHash(node.uiNode))
+
+
+def uiSubtreeFingerprint(node: UITreeNodeWithDisplayRegion) -> Tuple:
+    # The content key itself rather than hash() of it, which maps e.g. -1 and
+    #  -2 to the same value; fingerprints are compared for equality.
+    return uiSubtreeContentKey(node)
+
+
+class UIRootParseCache(object):
+    # Parsed windows of the previous frames, keyed on the pythonObjectAddress of
+    #  their root node and checked against uiSubtreeFingerprint, so unchanged
+    #  windows are not parsed again. Results that are reused keep referring to
+    #  the nodes of the frame they were parsed in. Entries not used in the
+    #  current or the previous frame are dropped.
+    #  With a memo, windows that are not found by address are looked up by
+    #  field and uiSubtreeContentKey before they are parsed, so a window that
+    #  comes back with the same content under a new address is not parsed
+    #  again. Memo entries from before the previous frame are evicted, as each
+    #  result keeps the whole frame it was parsed from alive.
+    #  A fingerprint hashes every raw node below the window root, which for
+    #  windows that parse cheaply, e.g. a long chat user list, costs more than
+    #  parsing them; see benchmarkParseCache in benchmarks.py.
+    def __init__(self, memo: Optional[ParseResultCache] = None):
+        self.memo = memo
+        self.frame = 0
+        # (field, address) -> (fingerprint, result, last frame used)
+        self.nodeResults: Dict[Tuple[str, str], Tuple[Tuple, Any, int]] = {}
+        # field -> (root node keys, result, last frame used), for parsers that
+        #  are not a PerNodeParser.
+        self.fieldResults: Dict[str, Tuple[Tuple, Any, int]] = {}
+        # Windows reused by address, found in the memo, and parsed.
+        self.reused = 0
+        self.memoHits = 0
+        self.parsed = 0
+
+    def beginFrame(self):
+        self.frame += 1
+        oldest = self.frame - 1
+        self.nodeResults = {k: v for k, v in self.nodeResults.items() if v[2] >= oldest}
+        self.fieldResults = {k: v for k, v in self.fieldResults.items() if v[2] >= oldest}
+        if self.memo is not None:
+            self.memo.generation = self.frame
+            self.memo.evictBefore(oldest)
+
+    def parseNode(self, field: str, parse: Callable[[UITreeNodeWithDisplayRegion], Any], node: UITreeNodeWithDisplayRegion) -> Any:
+        key = (field, node.uiNode.pythonObjectAddress)
+        fingerprint = uiSubtreeFingerprint(node)
+        entry = self.nodeResults.get(key)
+        if entry is not None and entry[0] == fingerprint:
+            self.reused += 1
+            result = entry[1]
+        else:
+            result = self._parseOrLookUp(lambda: (field, uiSubtreeContentKey(node)), lambda: parse(node))
+        self.nodeResults[key] = (fingerprint, result, self.frame)
+        return result
+
+    def parseNodes(self, field: str, fromNodes: Callable[[List[UITreeNodeWithDisplayRegion]], Any], nodes: List[UITreeNodeWithDisplayRegion]) -> Any:
+        keys = tuple((x.uiNode.pythonObjectAddress, uiSubtreeFingerprint(x)) for x in nodes)
+        entry = self.fieldResults.get(field)
+        if entry is not None and entry[0] == keys:
+            self.reused += 1
+            result = entry[1]
+        else:
+            result = self._parseOrLookUp(lambda: (field, tuple(uiSubtreeContentKey(x) for x in nodes)), lambda: fromNodes(nodes))
+        self.fieldResults[field] = (keys, result, self.frame)
+        return result
+
+    def _parseOrLookUp(self, memoKey: Callable[[], Hashable], parse: Callable[[], Any]) -> Any:
+        if self.memo is None:
+            self.parsed += 1
+            return parse()
+        hits = self.memo.hits
+        result = self.memo.getOrParse(memoKey(), parse)
+        if self.memo.hits > hits:
+            self.memoHits += 1
+        else:
+            self.parsed += 1
+        return result
+
+
+def parseUIRootField(parser: UIRootParser, nodes: List[UITreeNodeWithDisplayRegion], cache: Optional[UIRootParseCache] = None) -> Any:
+    if cache is None:
+        return parser.fromNodes(nodes)
+    fromNodes = parser.fromNodes
+    if type(fromNodes) is PerNodeParser:
+        if fromNodes.firstOnly:
+            return cache.parseNode(parser.field, fromNodes.parse, nodes[0]) if len(nodes) > 0 else None
+        return [cache.parseNode(parser.field, fromNodes.parse, x) for x in nodes]
+    return cache.parseNodes(parser.field, fromNodes, nodes)
+
+
+def collectUIRootNodes(uiTree: UITreeNodeWithDisplayRegion, parsers: Optional[List[UIRootParser]] = None) -> Dict[str, List[UITreeNodeWithDisplayRegion]]:
+    # Field -> candidate root nodes. Read off the type index when the tree has
+    #  one, otherwise gathered in a single walk.
+    parsers = _uiRootParsers if parsers is None else parsers
+    result: Dict[str, List[UITreeNodeWithDisplayRegion]] = {x.field: [] for x in parsers}
+    index = getattr(uiTree, 'treeIndex', None)
+    if index is not None:
+        for parser in parsers:
+            positions = sorted(x for typeName in parser.pythonObjectTypeNames for x in index.typeNames.get(typeName, ()))
+            result[parser.field] = index.inSubtree(positions, uiTree)
+        return result
+    fieldsByType: Dict[str, List[str]] = {}
+    for parser in parsers:
+        for typeName in parser.pythonObjectTypeNames:
+            fieldsByType.setdefault(typeName, []).append(parser.field)
+    for node in iterDescendants(uiTree, ofTypes=fieldsByType):
+        for field in fieldsByType[node.uiNode.pythonObjectTypeName]:
+            result[field].append(node)
+    return result
+
+
 def unwrapUITreeNodeChild(child: UITreeNodeChild) -> UITreeNode:
     # print("Type of Child :", type(child))
     if type(child) == UITreeNodeChild:
@@ -123,17 +314,27 @@ def unwrapUITreeNodeChild(child: UITreeNodeChild) -> UITreeNode:
 #             node
 
 
-def asUITreeNodeWithDisplayRegion(selfDisplayRegion: DisplayRegion, totalDisplayRegion: DisplayRegion, uiNode: UITreeNode) -> UITreeNodeWithDisplayRegion:
-    x = UITreeNodeWithDisplayRegion()
-    x.uiNode = uiNode
-    dr = Location2d()
-    dr.x = totalDisplayRegion.x
-    dr.y = totalDisplayRegion.y
-    x.children = [asUITreeNodeWithInheritedOffset(dr, unwrapUITreeNodeChild(
-        x)) for x in uiNode.children if x is not None] if uiNode.children is not None else None  # TODO: for all children do `unwrapUITreeNodeChild`
-    x.selfDisplayRegion = selfDisplayRegion
-    x.totalDisplayRegion = totalDisplayRegion
-    return x
+def asUITreeNodeWithDisplayRegion(selfDisplayRegion: DisplayRegion, totalDisplayRegion: DisplayRegion, uiNode: UITreeNode, lazy: bool = False) -> UITreeNodeWithDisplayRegion:
+    root = UITreeNodeWithDisplayRegion()
+    root.uiNode = uiNode
+    root.selfDisplayRegion = selfDisplayRegion
+    root.totalDisplayRegion = totalDisplayRegion
+    if lazy:
+        # Children are built on first access, see UITreeNodeWithDisplayRegion.
+        return root
+    # Explicit stack instead of recursing through asUITreeNodeWithInheritedOffset,
+    #  deep trees would otherwise hit the recursion limit. Nodes are visited in
+    #  pre-order and added to the frame's UITreeIndex on the way.
+    index = UITreeIndex()
+    stack = [(root, NO_POSITION)]
+    while len(stack) > 0:
+        x, parentPosition = stack.pop()
+        position = index.add(x, parentPosition)
+        x.children = childrenWithInheritedOffset(x)
+        if x.children:
+            stack.extend((child, position) for child in reversed(x.children) if type(child) == UITreeNodeWithDisplayRegion)
+    index.close()
+    return root
 
 # asUITreeNodeWithDisplayRegion : { selfDisplayRegion : DisplayRegion, totalDisplayRegion : DisplayRegion } -> UITreeNode -> UITreeNodeWithDisplayRegion
 # asUITreeNodeWithDisplayRegion { selfDisplayRegion, totalDisplayRegion } uiNode =
@@ -145,13 +346,10 @@ def asUITreeNodeWithDisplayRegion(selfDisplayRegion: DisplayRegion, totalDisplay
 
 
 def asUITreeNodeWithInheritedOffset(inheritedOffset: Location2d, rawNode: UITreeNode) -> UITreeNodeWithDisplayRegion:
-    selfRegion = getDisplayRegionFromDictEntries(rawNode)
-    if selfRegion is None:
-        return ChildWithoutRegion(rawNode)
-    a = copy(selfRegion)
-    a.x += (inheritedOffset.x or 0)
-    a.y += (inheritedOffset.y or 0)
-    return asUITreeNodeWithDisplayRegion(selfRegion, a, rawNode)
+    x = uiTreeNodeWithInheritedOffset(inheritedOffset.x or 0, inheritedOffset.y or 0, rawNode)
+    if type(x) != UITreeNodeWithDisplayRegion:
+        return x
+    return asUITreeNodeWithDisplayRegion(x.selfDisplayRegion, x.totalDisplayRegion, rawNode)
 
 
 # asUITreeNodeWithInheritedOffset : { x : int, y : int } -> UITreeNode -> ChildOfNodeWithDisplayRegion
@@ -171,31 +369,7 @@ def asUITreeNodeWithInheritedOffset(inheritedOffset: Location2d, rawNode: UITree
 
 
 def getDisplayRegionFromDictEntries(uiNode: UITreeNode) -> Optional[DisplayRegion]:
-    def fixedNumberFromJsonValue(val: Union[int, str]):
-        if type(val) is int:
-            return val
-        else:
-            try:
-                # print("Val", val)
-                if val is None:
-                    return 0
-                if type(val) is dict:
-                    return int(val.get("int_low32"))
-                return int(val)
-            except Exception as e:
-                print("Excemption Parsing: ", e)
-                return None
-
-    def fixedNumberFromPropertyName(name: str) -> int:
-        return fixedNumberFromJsonValue(uiNode.dictEntriesOfInterest.get(name))
-
-    dr = DisplayRegion()
-    dr.x = fixedNumberFromPropertyName("_displayX")
-    dr.y = fixedNumberFromPropertyName("_displayY")
-    dr.width = fixedNumberFromPropertyName("_displayWidth")
-    dr.height = fixedNumberFromPropertyName("_displayHeight")
-    # print("Display Region: ", vars(dr))
-    return dr
+    return displayRegionFromUITreeNode(uiNode)
 
 # getDisplayRegionFromDictEntries : UITreeNode -> Maybe DisplayRegion
 # getDisplayRegionFromDictEntries uiNode =
@@ -224,8 +398,7 @@ def getDisplayRegionFromDictEntries(uiNode: UITreeNode) -> Optional[DisplayRegio
 
 
 def parseContextMenusFromUITreeRoot(uiTreeRoot: UITreeNodeWithDisplayRegion) -> List[ContextMenu]:
-    displayRegions = [x for x in listChildrenWithDisplayRegion(
-        uiTreeRoot) if getNameFromDictEntries(x.uiNode).lower() == 'l_menu']
+    displayRegions = listChildrenWithDisplayRegionWithName(uiTreeRoot, 'l_menu', ignoreCase=True)
     if len(displayRegions) == 0:
         return []
     layerMenu = displayRegions[0]
@@ -249,7 +422,25 @@ def parseContextMenusFromUITreeRoot(uiTreeRoot: UITreeNodeWithDisplayRegion) ->
 
 
 def parseInfoPanelContainerFromUIRoot(uiTreeRoot: UITreeNodeWithDisplayRegion) -> Optional[InfoPanelContainer]:
-    raise NotImplementedError()
+    candidates = listDescendantsWithDisplayRegionOfType(uiTreeRoot, 'InfoPanelContainer')
+    if len(candidates) == 0:
+        return None
+    return parseInfoPanelContainer(mostPopulousNode(candidates))
+
+
+def mostPopulousNode(nodes: List[UITreeNodeWithDisplayRegion]) -> UITreeNodeWithDisplayRegion:
+    # max keeps the first of equally populous nodes, like the stable sort.
+    return max(nodes, key=countDescendantsWithDisplayRegion)
+
+
+def parseInfoPanelContainer(containerNode: UITreeNodeWithDisplayRegion) -> InfoPanelContainer:
+    result = InfoPanelContainer()
+    result.uiNode = containerNode
+    result.icons = parseInfoPanelIconsFromInfoPanelContainer(containerNode)
+    result.infoPanelLocationInfo = parseInfoPanelLocationInfoFromInfoPanelContainer(containerNode)
+    result.infoPanelRoute = parseInfoPanelRouteFromInfoPanelContainer(containerNode)
+    result.infoPanelAgentMissions = parseInfoPanelAgentMissionsFromInfoPanelContainer(containerNode)
+    return result
 # parseContextMenusFromUITreeRoot : UITreeNodeWithDisplayRegion -> Maybe InfoPanelContainer
 # parseInfoPanelContainerFromUIRoot uiTreeRoot =
 #     case
@@ -272,7 +463,21 @@ def parseInfoPanelContainerFromUIRoot(uiTreeRoot: UITreeNodeWithDisplayRegion) -
 
 
 def parseInfoPanelIconsFromInfoPanelContainer(infoPanelContainerNode: UITreeNodeWithDisplayRegion) -> Optional[InfoPanelIcons]:
-    raise NotImplementedError()
+    iconContainers = listDescendantsWithDisplayRegionWithName(infoPanelContainerNode, 'iconCont')
+    if len(iconContainers) == 0:
+        return None
+    iconContainerNode = min(iconContainers, key=lambda x: x.totalDisplayRegion.y)
+
+    def iconNodeFromTexturePathEnd(texturePathEnd: str) -> Optional[UITreeNodeWithDisplayRegion]:
+        return findFirstDescendant(iconContainerNode, lambda x: (getTexturePathFromDictEntries(x.uiNode) or '').endswith(texturePathEnd))
+    result = InfoPanelIcons()
+    result.uiNode = iconContainerNode
+    result.search = iconNodeFromTexturePathEnd("search.png")
+    result.locationInfo = iconNodeFromTexturePathEnd("LocationInfo.png")
+    result.route = iconNodeFromTexturePathEnd("Route.png")
+    result.agentMissions = iconNodeFromTexturePathEnd("Missions.png")
+    result.dailyChallenge = iconNodeFromTexturePathEnd("dailyChallenge.png")
+    return result
 
 # parseInfoPanelIconsFromInfoPanelContainer : UITreeNodeWithDisplayRegion -> Maybe InfoPanelIcons
 # parseInfoPanelIconsFromInfoPanelContainer infoPanelContainerNode =
@@ -309,7 +514,29 @@ def parseInfoPanelIconsFromInfoPanelContainer(infoPanelContainerNode: UITreeNode
 
 
 def parseInfoPanelLocationInfoFromInfoPanelContainer(infoPanelContainerNode: UITreeNodeWithDisplayRegion) -> Optional[InfoPanelLocationInfo]:
-    raise NotImplementedError()
+    infoPanelNodes = listDescendantsWithDisplayRegionOfType(infoPanelContainerNode, 'InfoPanelLocationInfo')
+    if len(infoPanelNodes) == 0:
+        return None
+    infoPanelNode = infoPanelNodes[0]
+    listSurroundingsButtons = listDescendantsWithDisplayRegionOfType(infoPanelNode, 'ListSurroundingsBtn')
+    if len(listSurroundingsButtons) == 0:
+        return None
+    texts = getAllContainedDisplayTexts(infoPanelNode)
+    securityStatusPercent = [y for y in (parseSecurityStatusPercentFromUINodeText(x) for x in texts) if y is not None]
+    currentSolarSystemName = [y for y in (parseCurrentSolarSystemFromUINodeText(x) for x in texts) if y is not None]
+    expandedContainer = findFirstDescendant(infoPanelNode, lambda x: "Container" in x.uiNode.pythonObjectTypeName and "mainCont" in (getNameFromDictEntries(x.uiNode) or ''))
+    expandedContent = None
+    if expandedContainer is not None:
+        currentStationName = [y for y in (parseCurrentStationNameFromInfoPanelLocationInfoLabelText(x) for x in getAllContainedDisplayTexts(expandedContainer)) if y is not None]
+        expandedContent = InfoPanelLocationInfoExpandedContent()
+        expandedContent.currentStationName = currentStationName[0] if len(currentStationName) > 0 else None
+    result = InfoPanelLocationInfo()
+    result.uiNode = infoPanelNode
+    result.listSurroundingsButton = listSurroundingsButtons[0]
+    result.currentSolarSystemName = currentSolarSystemName[0].strip() if len(currentSolarSystemName) > 0 else None
+    result.securityStatusPercent = securityStatusPercent[0] if len(securityStatusPercent) > 0 else None
+    result.expandedContent = expandedContent
+    return result
 # parseInfoPanelLocationInfoFromInfoPanelContainer : UITreeNodeWithDisplayRegion -> Maybe InfoPanelLocationInfo
 # parseInfoPanelLocationInfoFromInfoPanelContainer infoPanelContainerNode =
 #     case
@@ -370,7 +597,13 @@ def parseInfoPanelLocationInfoFromInfoPanelContainer(infoPanelContainerNode: UIT
 
 
 def parseSecurityStatusPercentFromUINodeText(s: str) -> Optional[int]:
-    raise NotImplementedError()
+    text = getSubstrBetweenXmlTagsAfterMarker("hint='Security status'")(s)
+    if text is None:
+        text = getSubstrBetweenXmlTagsAfterMarker("hint=\"Security status\"><color=")(s)
+    try:
+        return round(float(text.strip()) * 100)
+    except:
+        return None
 # parseSecurityStatusPercentFromUINodeText : str -> Maybe int
 # parseSecurityStatusPercentFromUINodeText =
 #     Maybe.Extra.oneOf
@@ -382,7 +615,10 @@ def parseSecurityStatusPercentFromUINodeText(s: str) -> Optional[int]:
 
 
 def parseCurrentSolarSystemFromUINodeText(s: str) -> Optional[str]:
-    raise NotImplementedError()
+    result = getSubstrBetweenXmlTagsAfterMarker("alt='Current Solar System'")(s)
+    if result is None:
+        result = getSubstrBetweenXmlTagsAfterMarker("alt=\"Current Solar System\"")(s)
+    return result
 # parseCurrentSolarSystemFromUINodeText : str -> Maybe str
 # parseCurrentSolarSystemFromUINodeText =
 #     Maybe.Extra.oneOf
@@ -392,7 +628,8 @@ def parseCurrentSolarSystemFromUINodeText(s: str) -> Optional[str]:
 
 
 def parseCurrentStationNameFromInfoPanelLocationInfoLabelText(s: str) -> Optional[str]:
-    raise NotImplementedError()
+    result = getSubstrBetweenXmlTagsAfterMarker("alt='Current Station'")(s)
+    return None if result is None else result.strip()
 # parseCurrentStationNameFromInfoPanelLocationInfoLabelText : str -> Maybe str
 # parseCurrentStationNameFromInfoPanelLocationInfoLabelText =
 #     getSubstrBetweenXmlTagsAfterMarker "alt='Current Station'"
@@ -400,7 +637,14 @@ def parseCurrentStationNameFromInfoPanelLocationInfoLabelText(s: str) -> Optiona
 
 
 def parseInfoPanelRouteFromInfoPanelContainer(infoPanelContainerNode: UITreeNodeWithDisplayRegion) -> Optional[InfoPanelRoute]:
-    raise NotImplementedError()
+    infoPanelRouteNodes = listDescendantsWithDisplayRegionOfType(infoPanelContainerNode, 'InfoPanelRoute')
+    if len(infoPanelRouteNodes) == 0:
+        return None
+    infoPanelRouteNode = infoPanelRouteNodes[0]
+    result = InfoPanelRoute()
+    result.uiNode = infoPanelRouteNode
+    result.routeElementMarker = [InfoPanelRouteRouteElementMarker(uiNode=x) for x in listDescendantsWithDisplayRegionOfType(infoPanelRouteNode, 'AutopilotDestinationIcon')]
+    return result
 # parseInfoPanelRouteFromInfoPanelContainer : UITreeNodeWithDisplayRegion -> Maybe InfoPanelRoute
 # parseInfoPanelRouteFromInfoPanelContainer infoPanelContainerNode =
 #     case
@@ -423,7 +667,14 @@ def parseInfoPanelRouteFromInfoPanelContainer(infoPanelContainerNode: UITreeNode
 
 
 def parseInfoPanelAgentMissionsFromInfoPanelContainer(infoPanelContainerNode: UITreeNodeWithDisplayRegion) -> Optional[InfoPanelAgentMissions]:
-    raise NotImplementedError()
+    infoPanelNodes = listDescendantsWithDisplayRegionOfType(infoPanelContainerNode, 'InfoPanelAgentMissions')
+    if len(infoPanelNodes) == 0:
+        return None
+    infoPanelNode = infoPanelNodes[0]
+    result = InfoPanelAgentMissions()
+    result.uiNode = infoPanelNode
+    result.entries = [InfoPanelAgentMissionsEntry(uiNode=x) for x in listDescendantsWithDisplayRegionOfType(infoPanelNode, 'MissionEntry')]
+    return result
 # parseInfoPanelAgentMissionsFromInfoPanelContainer : UITreeNodeWithDisplayRegion -> Maybe InfoPanelAgentMissions
 # parseInfoPanelAgentMissionsFromInfoPanelContainer infoPanelContainerNode =
 #     case
@@ -497,36 +748,35 @@ def parseContextMenu(contextMenuUINode: UITreeNodeWithDisplayRegion) -> ContextM
 
 
 def parseShipUIFromUITreeRoot(uiTreeRoot: UITreeNodeWithDisplayRegion) -> Optional[ShipUI]:
-    displays = [x for x in listDescendantsWithDisplayRegion(
-        uiTreeRoot) if x.uiNode.pythonObjectTypeName == 'ShipUI']
+    displays = listDescendantsWithDisplayRegionOfType(uiTreeRoot, 'ShipUI')
     if len(displays) == 0:
         return None
-    shipUINode = displays[0]
-    uiNodes = [x for x in listDescendantsWithDisplayRegion(
-        shipUINode) if x.uiNode.pythonObjectTypeName == 'CapacitorContainer']
+    return parseShipUI(displays[0])
+
+
+def parseShipUI(shipUINode: UITreeNodeWithDisplayRegion) -> Optional[ShipUI]:
+    uiNodes = listDescendantsWithDisplayRegionOfType(shipUINode, 'CapacitorContainer')
     if len(uiNodes) == 0:
         return None
     capacitorUINode = uiNodes[0]
 
     def descendantNodesFromPythonObjectTypeNameEqual(pythonObjectTypeName: str):
-        return [x for x in listDescendantsWithDisplayRegion(shipUINode) if x.uiNode.pythonObjectTypeName == pythonObjectTypeName]
+        return listDescendantsWithDisplayRegionOfType(shipUINode, pythonObjectTypeName)
     capacitor = parseShipUICapacitorFromUINode(capacitorUINode)
 
-    speedGaugeElement = [x for x in listDescendantsWithDisplayRegion(
-        shipUINode) if x.uiNode.pythonObjectTypeName == 'SpeedGauge']
+    speedGaugeElement = listDescendantsWithDisplayRegionOfType(shipUINode, 'SpeedGauge')
     if len(speedGaugeElement) == 0:
         return None
     speedGaugeElement = speedGaugeElement[0]
-    maybeIndicationNode = [x for x in listDescendantsWithDisplayRegion(
-        shipUINode) if 'indicationcontainer' in (getNameFromDictEntries(x.uiNode) or '').lower()][0]
+    maybeIndicationNode = listDescendantsWithDisplayRegionWithNameContaining(shipUINode, 'indicationcontainer')[0]
     indication = parseShipUIIndication(maybeIndicationNode) or None
-    decendants = [x for x in listDescendantsWithDisplayRegion(shipUINode) if x.uiNode.pythonObjectTypeName == 'ShipSlot']
+    decendants = listDescendantsWithDisplayRegionOfType(shipUINode, 'ShipSlot')
     modulebuttons = []
     for slotNode in decendants:
-        moduleButtonNode = [x for x in listDescendantsWithDisplayRegion(slotNode) if x.uiNode.pythonObjectTypeName == 'ModuleButton'][0]
+        moduleButtonNode = listDescendantsWithDisplayRegionOfType(slotNode, 'ModuleButton')[0]
         modulebuttons.append(parseShipUIModuleButton(slotNode, moduleButtonNode))
     def getLastValuePercentFromGaugeName(gaugeName):
-        options = [x for x in listDescendantsWithDisplayRegion(shipUINode) if getNameFromDictEntries(x.uiNode) == gaugeName]
+        options = listDescendantsWithDisplayRegionWithName(shipUINode, gaugeName)
         if len(options) == 0: return None
         option = options[0].uiNode.dictEntriesOfInterest.get('_lastValue')
         if option: option = float(option)
@@ -536,9 +786,9 @@ def parseShipUIFromUITreeRoot(uiTreeRoot: UITreeNodeWithDisplayRegion) -> Option
     maybeHitpointsPercent.armor = getLastValuePercentFromGaugeName('armorGauge')
     maybeHitpointsPercent.structure = getLastValuePercentFromGaugeName('structureGauge')
     maybeHitpointsPercent.shield = getLastValuePercentFromGaugeName('shieldGauge')
-    offensiveBuffButtonNames = [x for x in listDescendantsWithDisplayRegion(shipUINode) if x.uiNode.pythonObjectTypeName == 'OffensiveBuffButton']
+    offensiveBuffButtonNames = listDescendantsWithDisplayRegionOfType(shipUINode, 'OffensiveBuffButton')
     # and getNameFromDictEntries(.uiNode)
-    _squadronsUI = [parseSquadronsUI(x) for x in listDescendantsWithDisplayRegion(shipUINode) if x.uiNode.pythonObjectTypeName == 'SquadronsUI']
+    _squadronsUI = [parseSquadronsUI(x) for x in listDescendantsWithDisplayRegionOfType(shipUINode, 'SquadronsUI')]
     squadronsUI = None if len(_squadronsUI) == 0 else squadronsUI[0]
     data = ShipUI()
     data.uiNode = shipUINode
@@ -553,6 +803,8 @@ def parseShipUIFromUITreeRoot(uiTreeRoot: UITreeNodeWithDisplayRegion) -> Option
     data.maxSpeedButton = descendantNodesFromPythonObjectTypeNameEqual("MaxSpeedButton")[0]
     return data
 
+registerDictEntryKeys('_lastValue')
+
 
 
 
@@ -674,6 +926,8 @@ def parseShipUIModuleButton(slotNode: UITreeNodeWithDisplayRegion, moduleButtonN
     result.rampRotationMilli = rampRotationMilli
     return result
 
+registerDictEntryKeys('ramp_active')
+
 # parseShipUIModuleButton : { slotNode : UITreeNodeWithDisplayRegion, moduleButtonNode : UITreeNodeWithDisplayRegion } -> ShipUIModuleButton
 # parseShipUIModuleButton { slotNode, moduleButtonNode } =
 #     let
@@ -714,7 +968,7 @@ def parseShipUIModuleButton(slotNode: UITreeNodeWithDisplayRegion, moduleButtonN
 
 
 def parseShipUICapacitorFromUINode(capacitorUINode: UITreeNodeWithDisplayRegion) -> ShipUICapacitor:
-    pmarks = [ShipUICapacitorPmark(uiNode=x, colorPercent=getColorPercentFromDictEntries(x.uiNode)) for x in listDescendantsWithDisplayRegion(capacitorUINode) if getNameFromDictEntries(x.uiNode) == 'pmark']
+    pmarks = [ShipUICapacitorPmark(uiNode=x, colorPercent=getColorPercentFromDictEntries(x.uiNode)) for x in listDescendantsWithDisplayRegionWithName(capacitorUINode, 'pmark')]
     _maybePmarksFills = [ x.colorPercent if x.colorPercent.a < 20 else None for x in pmarks ]
     maybePmarksFills = _maybePmarksFills if None not in _maybePmarksFills else None
     levelFromPmarksPercent = None
@@ -818,7 +1072,7 @@ def groupShipUIModulesintoRows(capacitor: ShipUICapacitor, modules: List[ShipUIM
 
 
 def parseShipUIIndication(indicationUINode: UITreeNodeWithDisplayRegion) -> ShipUIIndication:
-    displayTexts = getAllContainedDisplayTexts(indicationUINode.uiNode)
+    displayTexts = getAllContainedDisplayTexts(indicationUINode)
     _maneuvertype = [ candidateManeuverType for  pattern, candidateManeuverType in [
             ("Warp", ShipManeuverType.ManeuverWarp),
             ("Jump", ShipManeuverType.ManeuverJump),
@@ -910,7 +1164,7 @@ def parseSquadronAbilityIcon(abilityIconUINode: UITreeNodeWithDisplayRegion) ->
 
 
 def parseTargetsFromUITreeRoot(x: UITreeNodeWithDisplayRegion) -> List[Target]:
-    return [parseTarget(y) for y in listDescendantsWithDisplayRegion(x) if y.uiNode.pythonObjectTypeName == 'TargetInBar']
+    return [parseTarget(y) for y in listDescendantsWithDisplayRegionOfType(x, 'TargetInBar')]
 # parseTargetsFromUITreeRoot : UITreeNodeWithDisplayRegion -> List Target
 # parseTargetsFromUITreeRoot =
 #     listDescendantsWithDisplayRegion
@@ -922,7 +1176,7 @@ def parseTarget(targetNode: UITreeNodeWithDisplayRegion) -> Target:
     textsTopToBottom = getAllContainedDisplayTextsWithRegion(targetNode)
     textsTopToBottom.sort( key=lambda x: x[1].totalDisplayRegion.y)
     textsTopToBottom = [x[0] for x in textsTopToBottom]
-    barAndImageCont = [x for x in listDescendantsWithDisplayRegion(targetNode) if getNameFromDictEntries(x.uiNode) == 'barAndImageCont'][0]
+    barAndImageCont = findFirstDescendant(targetNode, lambda x: getNameFromDictEntries(x.uiNode) == 'barAndImageCont')
     isActiveTarget = [x for x in listDescendantsInUITreeNode(targetNode.uiNode) if x.pythonObjectTypeName == 'ActiveTargetOnBracket']
     assignedContainerNode = [x for x in listDescendantsWithDisplayRegion(targetNode) if 'assigned' in getNameFromDictEntries(x.uiNode).lower() ]
     assignedContainerNode.sort( key = lambda x: x.totalDisplayRegion.width)
@@ -977,10 +1231,14 @@ def parseTarget(targetNode: UITreeNodeWithDisplayRegion) -> Target:
 
 
 def parseOverviewWindowFromUITreeRoot(uiTreeRoot: UITreeNodeWithDisplayRegion) -> Optional[OverviewWindow]:
-    data = [ x for x in listDescendantsWithDisplayRegion(uiTreeRoot) if x.uiNode.pythonObjectTypeName == 'OverView']
-    if len(data) == 0: return None
-    overviewWindowNode = data[0]
-    scrollNode = [x for x in listDescendantsWithDisplayRegion(overviewWindowNode) if "scroll" in x.uiNode.pythonObjectTypeName.lower()][0]
+    data = listDescendantsWithDisplayRegionOfType(uiTreeRoot, 'OverView')
+    if len(data) == 0:
+        return None
+    return parseOverviewWindow(data[0])
+
+
+def parseOverviewWindow(overviewWindowNode: UITreeNodeWithDisplayRegion) -> Optional[OverviewWindow]:
+    scrollNode = findFirstDescendant(overviewWindowNode, lambda x: "scroll" in x.uiNode.pythonObjectTypeName.lower())
 
     for _node in listDescendantsWithDisplayRegion(scrollNode):
         if "ScrollControls" in _node.uiNode.pythonObjectTypeName:
@@ -989,8 +1247,8 @@ def parseOverviewWindowFromUITreeRoot(uiTreeRoot: UITreeNodeWithDisplayRegion) -
         if "scroll" in _node.uiNode.pythonObjectTypeName.lower():
             headersContrainerNode = _node
             continue
-    entriesHeaders = [x for x in listDescendantsWithDisplayRegion(headersContrainerNode) if "headers" in x.uiNode.pythonObjectTypeName.lower()][0]
-    entries = [parseOverviewWindowEntry(entriesHeaders, x) for x in listDescendantsWithDisplayRegion(overviewWindowNode) if x.uiNode.pythonObjectTypeName == 'OverviewScrollEntry']
+    entriesHeaders = findFirstDescendant(headersContrainerNode, lambda x: "headers" in x.uiNode.pythonObjectTypeName.lower())
+    entries = [parseOverviewWindowEntry(entriesHeaders, x) for x in listDescendantsWithDisplayRegionOfType(overviewWindowNode, 'OverviewScrollEntry')]
 
     x = OverviewWindow()
     x.entries = entries
@@ -1062,11 +1320,11 @@ def parseOverviewWindowEntry(entriesHeaders: List[Tuple[str, UITreeNodeWithDispl
         objectDistanceInMeters = parseOverviewEntryDistanceInMetersFromText(objectDistance)
     except:
         pass
-    spaceObjectIconNode = [x for x in listDescendantsWithDisplayRegion(overviewEntryNode) if x.uiNode.pythonObjectTypeName == 'SpaceObjectIcon'][0]
-    iconSpriteColorPercent = [getColorPercentFromDictEntries(x.uiNode) for x in listChildrenWithDisplayRegion(overviewEntryNode) if getNameFromDictEntries(x.uiNode) == 'iconSprite']
+    spaceObjectIconNode = listDescendantsWithDisplayRegionOfType(overviewEntryNode, 'SpaceObjectIcon')[0]
+    iconSpriteColorPercent = [getColorPercentFromDictEntries(x.uiNode) for x in listChildrenWithDisplayRegionWithName(overviewEntryNode, 'iconSprite')]
     namesUnderSpaceObjectIcon = {getNameFromDictEntries(x) for x in listDescendantsInUITreeNode(spaceObjectIconNode.uiNode)}
-    bgColorFillsPercent = [getColorPercentFromDictEntries(x.uiNode) for x in listDescendantsWithDisplayRegion(overviewEntryNode) if x.uiNode.pythonObjectTypeName == 'Fill' and getNameFromDictEntries(x.uiNode) == 'bgColor']
-    rightAlignedIconsHints = {getHintTextFromDictEntries(y.uiNode).lower() for x in listDescendantsWithDisplayRegion(overviewEntryNode)  for y in listDescendantsWithDisplayRegion(x) if getNameFromDictEntries(x.uiNode) == 'rightAlignedIconContainer'}
+    bgColorFillsPercent = [getColorPercentFromDictEntries(x.uiNode) for x in listDescendantsWithDisplayRegionOfType(overviewEntryNode, 'Fill') if getNameFromDictEntries(x.uiNode) == 'bgColor']
+    rightAlignedIconsHints = {getHintTextFromDictEntries(y.uiNode).lower() for x in listDescendantsWithDisplayRegionWithName(overviewEntryNode, 'rightAlignedIconContainer') for y in listDescendantsWithDisplayRegionWithHint(x)}
     def rightAlignedIconsHintsContainsTextIgnoringCase(textToSearch: str) -> bool:
         return textToSearch.lower() in rightAlignedIconsHints
     result = OverviewWindowEntry()
@@ -1235,7 +1493,7 @@ def parseDistanceUnitInMeters(unitText: str) -> Optional[int]:
 
 
 def parseSelectedItemWindowFromUITreeRoot(uiTreeRoot: UITreeNodeWithDisplayRegion) -> Optional[SelectedItemWindow]:
-    data = [parseSelectedItemWindow(x) for x in listDescendantsWithDisplayRegion(uiTreeRoot) if x.uiNode.pythonObjectTypeName == 'ActiveItem']
+    data = [parseSelectedItemWindow(x) for x in listDescendantsWithDisplayRegionOfType(uiTreeRoot, 'ActiveItem')]
     return None if len(data) == 0 else data[0]
 # parseSelectedItemWindowFromUITreeRoot : UITreeNodeWithDisplayRegion -> Maybe SelectedItemWindow
 # parseSelectedItemWindowFromUITreeRoot uiTreeRoot =
@@ -1268,11 +1526,13 @@ def parseSelectedItemWindow(windowNode: UITreeNodeWithDisplayRegion) -> Selected
 
 
 def parseDronesWindowFromUITreeRoot(uiTreeRoot: UITreeNodeWithDisplayRegion) -> Optional[DronesWindow]:
-    _droneViews = [x for x in listDescendantsWithDisplayRegion(
-        uiTreeRoot) if x.uiNode.pythonObjectTypeName == 'DroneView']
+    _droneViews = listDescendantsWithDisplayRegionOfType(uiTreeRoot, 'DroneView')
     if len(_droneViews) == 0:
         return None
-    _droneView = _droneViews[0]
+    return parseDronesWindow(_droneViews[0])
+
+
+def parseDronesWindow(_droneView: UITreeNodeWithDisplayRegion) -> Optional[DronesWindow]:
     scrollNodes = []
     droneEntries = []
     droneGroupHeaders = []
@@ -1596,8 +1856,7 @@ def parseDronesWindowDroneEntry(droneEntryNode: UITreeNodeWithDisplayRegion) ->
     maintext = [x[0] for x in maintext][0]
 
     def gaugeValuePercentFromContainerName(containerName: str):
-        gaugeNode = [x for x in listDescendantsWithDisplayRegion(
-            droneEntryNode) if getNameFromDictEntries(x.uiNode) == containerName][0]
+        gaugeNode = findFirstDescendant(droneEntryNode, lambda x: getNameFromDictEntries(x.uiNode) == containerName)
 
         def gaudeDescendantFromName(gaugeDescendantName: str) -> List[UITreeNodeWithDisplayRegion]:
             return [x for x in listDescendantsWithDisplayRegion(gaugeNode) if getNameFromDictEntries(x.uiNode) == gaugeDescendantName]
@@ -1677,11 +1936,13 @@ def parseDronesWindowDroneEntry(droneEntryNode: UITreeNodeWithDisplayRegion) ->
 
 
 def parseProbeScannerWindowFromUITreeRoot(uiTreeRoot: UITreeNodeWithDisplayRegion) -> Optional[ProbeScannerWindow]:
-    displayRegion = [x for x in listDescendantsWithDisplayRegion(
-        uiTreeRoot) if x.uiNode.pythonObjectTypeName == "ProbeScannerWindow"]
+    displayRegion = listDescendantsWithDisplayRegionOfType(uiTreeRoot, "ProbeScannerWindow")
     if len(displayRegion) == 0:
         return None
-    windowNode = displayRegion[0]
+    return parseProbeScannerWindow(displayRegion[0])
+
+
+def parseProbeScannerWindow(windowNode: UITreeNodeWithDisplayRegion) -> Optional[ProbeScannerWindow]:
     scanResultsNodes: List[UITreeNodeWithDisplayRegion] = []
     scrollnodes: List[UITreeNodeWithDisplayRegion] = []
     for x in listDescendantsWithDisplayRegion(windowNode):
@@ -1691,8 +1952,7 @@ def parseProbeScannerWindowFromUITreeRoot(uiTreeRoot: UITreeNodeWithDisplayRegio
             scrollnodes.extend([y for y in listDescendantsWithDisplayRegion(
                 x) if 'scroll' in y.uiNode.pythonObjectTypeName.lower()])
     scrollnode = scrollnodes[0]
-    headersContainerNode = [x for x in listDescendantsWithDisplayRegion(
-        scrollnode) if 'header' in x.uiNode.pythonObjectTypeName.lower()][0]
+    headersContainerNode = findFirstDescendant(scrollnode, lambda x: 'header' in x.uiNode.pythonObjectTypeName.lower())
     entriesHeaders = getAllContainedDisplayTextsWithRegion(
         headersContainerNode)
     scanResults = [parseProbeScanResult(
@@ -1754,8 +2014,7 @@ def parseProbeScanResult(entriesHeaders: List[Tuple[str, UITreeNodeWithDisplayRe
         header = [header for _, header in entriesHeaders if header.totalDisplayRegion.x < (
             cellMiddle + 1) and cellMiddle < (header.totalDisplayRegion.x+header.totalDisplayRegion.width - 1)][0]
         maybeHeader.append((header, cellText))
-    warpButton = [x for x in listDescendantsWithDisplayRegion(scanResultNode) if (
-        getTexturePathFromDictEntries(x.uiNode) or '').endswith('44_32_18.png')][0]
+    warpButton = findFirstDescendant(scanResultNode, lambda x: (getTexturePathFromDictEntries(x.uiNode) or '').endswith('44_32_18.png'))
     result = ProbeScanResult()
     result.warpButton = warpButton
     result.textsLeftToRight = textsLeftToRight
@@ -1811,19 +2070,20 @@ def parseProbeScanResult(entriesHeaders: List[Tuple[str, UITreeNodeWithDisplayRe
 
 
 def parseDirectionalScannerWindowFromUITreeRoot(uiTreeRoot: UITreeNodeWithDisplayRegion) -> Optional[DirectionalScannerWindow]:
-    displayRegions = [x for x in listDescendantsWithDisplayRegion(
-        uiTreeRoot) if x.uiNode.pythonObjectTypeName == "DirectionalScanner"]
+    displayRegions = listDescendantsWithDisplayRegionOfType(uiTreeRoot, "DirectionalScanner")
     if len(displayRegions) == 0:
         return None
-    windowNode = displayRegions[0]
+    return parseDirectionalScannerWindow(displayRegions[0])
+
+
+def parseDirectionalScannerWindow(windowNode: UITreeNodeWithDisplayRegion) -> Optional[DirectionalScannerWindow]:
     scrollNode = [x for x in listDescendantsWithDisplayRegion(
         windowNode) if 'scroll' in x.uiNode.pythonObjectTypeName.lower()]
     scrollNode.sort(key=lambda x: areaFromDisplayRegion(
         x.totalDisplayRegion) or 0)  # Possibly need to Reverse?
     scrollNode = scrollNode[0]
 
-    scanResultsNodes = [x for x in listDescendantsWithDisplayRegion(
-        scrollNode) if x.uiNode.pythonObjectTypeName == 'DirectionalScanResultEntry']
+    scanResultsNodes = listDescendantsWithDisplayRegionOfType(scrollNode, 'DirectionalScanResultEntry')
     result = DirectionalScannerWindow()
     result.scanResults = scanResultsNodes
     result.scrollNode = scrollNode
@@ -1862,13 +2122,14 @@ def parseDirectionalScannerWindowFromUITreeRoot(uiTreeRoot: UITreeNodeWithDispla
 
 
 def parseStationWindowFromUITreeRoot(uiTreeRoot: UITreeNodeWithDisplayRegion) -> Optional[StationWindow]:
-    displayRegions = [x for x in listDescendantsWithDisplayRegion(
-        uiTreeRoot) if x.uiNode.pythonObjectTypeName == 'LobbyWnd']
+    displayRegions = listDescendantsWithDisplayRegionOfType(uiTreeRoot, 'LobbyWnd')
     if len(displayRegions) == 0:
         return None
-    windowNode = displayRegions[0]
-    buttons = [x for x in listDescendantsWithDisplayRegion(
-        windowNode) if x.uiNode.pythonObjectTypeName == 'Button']
+    return parseStationWindow(displayRegions[0])
+
+
+def parseStationWindow(windowNode: UITreeNodeWithDisplayRegion) -> Optional[StationWindow]:
+    buttons = listDescendantsWithDisplayRegionOfType(windowNode, 'Button')
 
     def buttonFromDisplayText(textToSearch: str):
         textToSearchLowercase = textToSearch.lower()
@@ -1876,7 +2137,7 @@ def parseStationWindowFromUITreeRoot(uiTreeRoot: UITreeNodeWithDisplayRegion) ->
         def textMatches(text):
             return text == textToSearchLowercase or (f">{textToSearchLowercase}<") in text
         _r = [y for x in buttons for y in getAllContainedDisplayTexts(
-            x.uiNode) if textMatches(y.lower().strip())]
+            x) if textMatches(y.lower().strip())]
         return _r[0] if len(_r) > 0 else None
     result = StationWindow()
     result.uiNode = windowNode
@@ -2143,7 +2404,7 @@ def parseInventoryCapacityGaugeText(capacityText: str) -> Union[str, InventoryWi
 
 
 def parseModuleButtonTooltipFromUITreeRoot(uiTreeRoot: UITreeNodeWithDisplayRegion) -> Optional[ModuleButtonTooltip]:
-     data = [x for x in listDescendantsWithDisplayRegion(uiTreeRoot) if x.uiNode.pythonObjectTypeName == 'ModuleButtonTooltip']
+     data = listDescendantsWithDisplayRegionOfType(uiTreeRoot, 'ModuleButtonTooltip')
      if len(data) == 0: return None
      return parseModuleButtonTooltip(data[0])
 # parseModuleButtonTooltipFromUITreeRoot : UITreeNodeWithDisplayRegion -> Maybe ModuleButtonTooltip
@@ -2269,8 +2530,7 @@ def parseKeyShortcutText(keytext: str) -> Optional[CUSTOMKEYCODE]:
 
 def parseChatWindowStacksFromUITreeRoot(uiTreeRoot: UITreeNodeWithDisplayRegion) -> List[ChatWindowStack]:
 
-    matches = (x for x in listDescendantsWithDisplayRegion(uiTreeRoot)
-               if x.uiNode.pythonObjectTypeName == 'ChatWindowStack')
+    matches = listDescendantsWithDisplayRegionOfType(uiTreeRoot, 'ChatWindowStack')
     return [parseChatWindowStack(x) for x in matches]
 # parseChatWindowStacksFromUITreeRoot : UITreeNodeWithDisplayRegion -> List ChatWindowStack
 # parseChatWindowStacksFromUITreeRoot uiTreeRoot =
@@ -2281,8 +2541,7 @@ def parseChatWindowStacksFromUITreeRoot(uiTreeRoot: UITreeNodeWithDisplayRegion)
 
 
 def parseChatWindowStack(chatWindowStackUiNode: UITreeNodeWithDisplayRegion) -> ChatWindowStack:
-    _s = [y for y in listDescendantsWithDisplayRegion(
-        chatWindowStackUiNode) if y.uiNode.pythonObjectTypeName == 'XmppChatWindow']
+    _s = listDescendantsWithDisplayRegionOfType(chatWindowStackUiNode, 'XmppChatWindow')
     chatWindowNode = _s[0]
     result = ChatWindowStack()
     result.uiNode = chatWindowStackUiNode
@@ -2304,21 +2563,13 @@ def parseChatWindowStack(chatWindowStackUiNode: UITreeNodeWithDisplayRegion) ->
 
 
 def parseChatWindow(chatWindowuiNode: UITreeNodeWithDisplayRegion) -> ChatWindow:
-    userListNode: List[UITreeNodeWithDisplayRegion] = []
-    keys = {}
-    for x in listDescendantsWithDisplayRegion(chatWindowuiNode):
-        _r = getNameFromDictEntries(x.uiNode)
-        # print(_r)
-        keys[x] = _r
-        if _r is not None and 'userlist' == _r:
-            userListNode.append(x)
+    userListNode = listDescendantsWithDisplayRegionWithName(chatWindowuiNode, 'userlist')
     print("------------")
-    print("Keys: ", keys.values())
     print(userListNode)
     _firstNode = userListNode[0]
     result = ChatWindow()
     result.uiNode = _firstNode
-    result.name = keys[_firstNode]
+    result.name = getNameFromDictEntries(_firstNode.uiNode)
     print("Name: ", result.name)
     result.userlist = parseChatWindowUserlist(_firstNode)
     return result
@@ -2339,18 +2590,9 @@ def parseChatWindow(chatWindowuiNode: UITreeNodeWithDisplayRegion) -> ChatWindow
 
 def parseChatWindowUserlist(userListNode: UITreeNodeWithDisplayRegion) -> ChatWindowUserlist:
     # visibleUsers = [x for x in listDescendantsWithDisplayRegion(userListNode) if foldl()]
-    visibleUsers = []
-    scrollDisplayRegions = []
-    for x in listDescendantsWithDisplayRegion(userListNode):
-        if x.uiNode.pythonObjectTypeName in ['XmppChatSimpleUserEntry', 'XmppChatUserEntry']:
-            # print("Raw: ", x.uiNode.pythonObjectTypeName, x.uiNode.pythonObjectAddress)
-            _c = parseChatUserEntry(x)
-            # print("_c", _c)
-            visibleUsers.append(_c)
-        if 'ScrollControls' in x.uiNode.pythonObjectTypeName:
-            scrollDisplayRegions.append(x)
-    scrollControls = parseScrollControls(scrollDisplayRegions[0]) if len(
-        scrollDisplayRegions) > 0 else None
+    visibleUsers = [parseChatUserEntry(x) for x in iterDescendants(userListNode, ofTypes=('XmppChatSimpleUserEntry', 'XmppChatUserEntry'))]
+    scrollControlsNode = findFirstDescendant(userListNode, lambda x: 'ScrollControls' in x.uiNode.pythonObjectTypeName)
+    scrollControls = parseScrollControls(scrollControlsNode) if scrollControlsNode is not None else None
     result = ChatWindowUserlist()
     result.uiNode = userListNode
     result.visibleUsers = visibleUsers
@@ -2381,13 +2623,12 @@ def parseChatUserEntry(chatUserUiNode: UITreeNodeWithDisplayRegion) -> ChatUserE
     # print([x.uiNode.pythonObjectTypeName for x in listDescendantsWithDisplayRegion(chatUserUiNode)])
     # print("Done.")
 
-    standingIconNodes = [x for x in listDescendantsWithDisplayRegion(
-        chatUserUiNode) if x.uiNode.pythonObjectTypeName == 'FlagIconWithState']
+    standingIconNodes = listDescendantsWithDisplayRegionOfType(chatUserUiNode, 'FlagIconWithState')
     # print(standingIconNodes)
     standingIconNode = standingIconNodes[0] if len(
         standingIconNodes) > 0 else None
     names = [x for x in getAllContainedDisplayTexts(
-        chatUserUiNode.uiNode) if x is not None]
+        chatUserUiNode) if x is not None]
     names.sort(key=len, reverse=True)
     # print("Names: " , names)
     name = names[0]
@@ -2504,7 +2745,7 @@ def parseSurveyScanWindow(windowUiNode: UITreeNodeWithDisplayRegion) -> SurveySc
 
 
 def parseBookmarkLocationWindowFromUITreeRoot(uiTreeRoot: UITreeNodeWithDisplayRegion) -> Optional[BookmarkLocationWindow]:
-    data = [parseBookmarkLocationWindow(x) for x in listDescendantsWithDisplayRegion(uiTreeRoot) if x.uiNode.pythonObjectTypeName == 'BookmarkLocationWindow']
+    data = [parseBookmarkLocationWindow(x) for x in listDescendantsWithDisplayRegionOfType(uiTreeRoot, 'BookmarkLocationWindow')]
     return None if len(data) == 0 else data[0]
 # parseBookmarkLocationWindowFromUITreeRoot : UITreeNodeWithDisplayRegion -> Maybe BookmarkLocationWindow
 # parseBookmarkLocationWindowFromUITreeRoot uiTreeRoot =
@@ -2517,7 +2758,7 @@ def parseBookmarkLocationWindowFromUITreeRoot(uiTreeRoot: UITreeNodeWithDisplayR
 
 def parseBookmarkLocationWindow(windowUINode: UITreeNodeWithDisplayRegion) -> BookmarkLocationWindow:
     def buttonFromLabelText(labelText: str) -> UITreeNodeWithDisplayRegion:
-        data = [x for x in listDescendantsWithDisplayRegion(windowUINode) if 'Button' in x.uiNode.pythonObjectTypeNam and labelText.lower() in [y.strip().lower() for y in getAllContainedDisplayTexts(x.uiNode)]]
+        data = [x for x in listDescendantsWithDisplayRegion(windowUINode) if 'Button' in x.uiNode.pythonObjectTypeNam and labelText.lower() in [y.strip().lower() for y in getAllContainedDisplayTexts(x)]]
         data.sort( key=lambda x: areaFromDisplayRegion(x.totalDisplayRegion) or 0)
         return data[0]
     r = BookmarkLocationWindow()
@@ -2841,8 +3082,7 @@ def parseMessageBox(uiNode: UITreeNodeWithDisplayRegion) -> MessageBox:
 
 
 def parseScrollControls(scrollControlsNode: UITreeNodeWithDisplayRegion) -> ScrollControls:
-    scrollHandles = [x for x in listDescendantsWithDisplayRegion(
-        scrollControlsNode) if x.uiNode.pythonObjectTypeName == 'ScrollHandle']
+    scrollHandles = listDescendantsWithDisplayRegionOfType(scrollControlsNode, 'ScrollHandle')
     scrollHandle = scrollHandles[0]
     sc = ScrollControls()
     sc.scrollHandle = scrollHandle
@@ -2873,10 +3113,14 @@ def parseLayerAbovemainFromUITreeRoot(uiTreeRoot: UITreeNodeWithDisplayRegion) -
 
 
 def getSubstrBetweenXmlTagsAfterMarker(marker: str) -> Callable[[str], Optional[str]]:
-    raise NotImplementedError()
-
     def fn(x: str) -> Optional[str]:
-        raise NotImplementedError()
+        afterMarker = x.split(marker)
+        if len(afterMarker) < 2:
+            return None
+        afterTag = afterMarker[1].split(">")
+        if len(afterTag) < 2:
+            return None
+        return afterTag[1].split("<")[0]
     return fn
 # getSubstrBetweenXmlTagsAfterMarker : str -> str -> Maybe str
 # getSubstrBetweenXmlTagsAfterMarker marker =
@@ -2931,6 +3175,9 @@ def getDisplayText(uiNode: UITreeNode) -> Optional[str]:
         if _n is not None:
             return _n
     return None
+
+registerDictEntryKeys('_setText', '_text')
+
 # getDisplayText : UITreeNode -> Maybe str
 # getDisplayText uiNode =
 #     [ "_setText", "_text" ]
@@ -2944,7 +3191,14 @@ def getDisplayText(uiNode: UITreeNode) -> Optional[str]:
 #         |> List.head
 
 
-def getAllContainedDisplayTexts(uiNode: UITreeNode) -> List[str]:
+def getAllContainedDisplayTexts(uiNode: Union[UITreeNode, UITreeNodeWithDisplayRegion]) -> List[str]:
+    # Display region nodes are answered from the texts collected by the
+    #  frame's UITreeIndex.
+    index = getattr(uiNode, 'treeIndex', None)
+    if index is not None:
+        return index.containedTexts(uiNode)
+    if type(uiNode) in (UITreeNodeWithDisplayRegion, UITreeStoreNodeWithDisplayRegion):
+        uiNode = uiNode.uiNode
     _list = [uiNode]
     _decendants = listDescendantsInUITreeNode(uiNode)
     if _decendants is not None:
@@ -2959,7 +3213,18 @@ def getAllContainedDisplayTexts(uiNode: UITreeNode) -> List[str]:
 
 
 def getAllContainedDisplayTextsWithRegion(uiNode: UITreeNodeWithDisplayRegion) -> List[Tuple[str, UITreeNodeWithDisplayRegion]]:
-    raise NotImplementedError()
+    index = getattr(uiNode, 'treeIndex', None)
+    if index is not None:
+        start, end = index.textRange(uiNode)
+        nodes = index.nodes
+        return [(text, nodes[position]) for text, position in zip(index.texts[start:end], index.textPositions[start:end])
+                if type(text) is str and len(text) > 0]
+    result = []
+    for x in [uiNode] + listDescendantsWithDisplayRegion(uiNode):
+        displayText = getDisplayText(x.uiNode)
+        if type(displayText) is str and len(displayText) > 0:
+            result.append((displayText, x))
+    return result
 
 # getAllContainedDisplayTextsWithRegion : UITreeNodeWithDisplayRegion -> List ( str, UITreeNodeWithDisplayRegion )
 # getAllContainedDisplayTextsWithRegion uiNode =
@@ -2980,6 +3245,9 @@ def getAllContainedDisplayTextsWithRegion(uiNode: UITreeNodeWithDisplayRegion) -
 
 def getNameFromDictEntries(x: UITreeNode) -> Optional[str]:
     return x.dictEntriesOfInterest.get("_name")
+
+registerDictEntryKeys('_name')
+
 # getNameFromDictEntries : UITreeNode -> Maybe str
 # getNameFromDictEntries =
 #     getstrPropertyFromDictEntries "_name"
@@ -2987,6 +3255,9 @@ def getNameFromDictEntries(x: UITreeNode) -> Optional[str]:
 
 def getHintTextFromDictEntries(x: UITreeNode) -> Optional[str]:
     return x.dictEntriesOfInterest.get("_hint")
+
+registerDictEntryKeys('_hint')
+
 # getHintTextFromDictEntries : UITreeNode -> Maybe str
 # getHintTextFromDictEntries =
 #     getstrPropertyFromDictEntries "_hint"
@@ -2994,6 +3265,9 @@ def getHintTextFromDictEntries(x: UITreeNode) -> Optional[str]:
 
 def getTexturePathFromDictEntries(x: UITreeNode) -> Optional[str]:
     return x.dictEntriesOfInterest.get('texturePath')
+
+registerDictEntryKeys('texturePath')
+
 # getTexturePathFromDictEntries : UITreeNode -> Maybe str
 # getTexturePathFromDictEntries =
 #     getstrPropertyFromDictEntries "texturePath"
@@ -3013,6 +3287,9 @@ def getTexturePathFromDictEntries(x: UITreeNode) -> Optional[str]:
 def getColorPercentFromDictEntries(x: UITreeNode) -> Optional[ColorComponents]:
     return jsonDecodeColorPercent(x.dictEntriesOfInterest.get('_color'))
 
+registerDictEntryKeys('_color')
+
+
 # getColorPercentFromDictEntries : UITreeNode -> Maybe ColorComponents
 # getColorPercentFromDictEntries =
 #     .dictEntriesOfinterest
@@ -3048,6 +3325,9 @@ def getRotationFloatFromDictEntries(x: UITreeNode) -> Optional[float]:
         return float(x.dictEntriesOfInterest.get('_rotation'))
     except:
         return None
+
+registerDictEntryKeys('_rotation')
+
 # getRotationFloatFromDictEntries : UITreeNode -> Maybe Float
 # getRotationFloatFromDictEntries =
 #     .dictEntriesOfinterest
@@ -3092,6 +3372,9 @@ def getHorizontalOffsetFromParentAndWidth(uiNode: UITreeNode) -> Optional[Offset
     except Exception as e:
         return None
 
+registerDictEntryKeys('_displayX', '_width')
+
+
 
 # getHorizontalOffsetFromParentAndWidth : UITreeNode -> Maybe { offset : int, width : int }
 # getHorizontalOffsetFromParentAndWidth uiNode =
@@ -3128,6 +3411,9 @@ def getVerticalOffsetFromParent(x: UITreeNode) -> Optional[int]:
         print("Exception Caught in getverticalOffsetFromParent: ", e)
     return None
 
+registerDictEntryKeys('_displayY')
+
+
 
 # getVerticalOffsetFromParent : UITreeNode -> Maybe int
 # getVerticalOffsetFromParent =
@@ -3137,9 +3423,14 @@ def getVerticalOffsetFromParent(x: UITreeNode) -> Optional[int]:
 #         >> Maybe.map round
 
 
-def getMostPopulousDescendantMatchingPredicate(uiTreeNode: UITreeNode, parent: UITreeNode) -> Optional[UITreeNode]:
-    raise NotImplementedError()
-    # listDescendantsInUITreeNode(parent)
+def getMostPopulousDescendantMatchingPredicate(predicate: Callable[[UITreeNode], bool], parent: UITreeNode) -> Optional[UITreeNode]:
+    descendants, counts = listDescendantsInUITreeNodeWithCounts(parent)
+    # Sorting ascending and reversing puts the last of equally populous nodes first.
+    result = None
+    for i, x in enumerate(descendants):
+        if predicate(x) and (result is None or counts[i] >= counts[result]):
+            result = i
+    return None if result is None else descendants[result]
 # getMostPopulousDescendantMatchingPredicate : (UITreeNode -> bool) -> UITreeNode -> Maybe UITreeNode
 # getMostPopulousDescendantMatchingPredicate predicate parent =
 #     listDescendantsInUITreeNode parent
@@ -3149,13 +3440,67 @@ def getMostPopulousDescendantMatchingPredicate(uiTreeNode: UITreeNode, parent: U
 #         |> List.head
 
 
+def countDescendantsInUITreeNode(parent: UITreeNode) -> int:
+    if type(parent) is UITreeStoreNode:
+        return parent.store.subtreeEnd[parent.row] - parent.row - 1
+    return len(listDescendantsInUITreeNode(parent))
+
+# countDescendantsInUITreeNode : UITreeNode -> Int
+# countDescendantsInUITreeNode parent =
+#     parent.children
+#         |> Maybe.withDefault []
+#         |> List.map unwrapUITreeNodeChild
+#         |> List.map (countDescendantsInUITreeNode >> (+) 1)
+#         |> List.sum
+
+
+def listDescendantsInUITreeNodeWithCounts(parent: UITreeNode) -> Tuple[List[UITreeNode], List[int]]:
+    # listDescendantsInUITreeNode together with the descendant count of each
+    #  node, by position. Counted in the same walk, every node's children are
+    #  read once; UITreeStore views take the counts from subtreeEnd.
+    if type(parent) is UITreeStoreNode:
+        store = parent.store
+        rows = range(parent.row + 1, store.subtreeEnd[parent.row])
+        return [UITreeStoreNode(store, x) for x in rows], [store.subtreeEnd[x] - x - 1 for x in rows]
+    nodes: List[UITreeNode] = []
+    counts: List[int] = []
+    # Nodes to visit, and the positions of nodes whose subtree ends there.
+    stack: List[Any] = list(reversed(parent.children or []))
+    while len(stack) > 0:
+        x = stack.pop()
+        if type(x) is int:
+            counts[x] = len(nodes) - x - 1
+            continue
+        stack.append(len(nodes))
+        nodes.append(x)
+        counts.append(0)
+        _c = x.children
+        if _c:
+            stack.extend(reversed(_c))
+    return nodes, counts
+
+
+def countDescendantsWithDisplayRegion(parent: UITreeNodeWithDisplayRegion) -> int:
+    # Constant time for nodes in a UITreeIndex or a UITreeStore.
+    index = getattr(parent, 'treeIndex', None)
+    if index is not None:
+        return index.subtreeEnd[parent.position] - parent.position - 1
+    if type(parent) is UITreeStoreNodeWithDisplayRegion:
+        return parent.store.subtreeEnd[parent.row] - parent.row - 1
+    return len(listDescendantsWithDisplayRegion(parent))
+
+
 def listDescendantsInUITreeNode(parent: UITreeNode) -> List[UITreeNode]:
-    _p = parent.children or []
-    _r = [unwrapUITreeNodeChild(x) for x in _p]
+    if type(parent) is UITreeStoreNode:
+        return parent.listDescendants()
     result: List[UITreeNode] = []
-    for x in _r:
+    stack = list(reversed(parent.children or []))
+    while len(stack) > 0:
+        x = stack.pop()
         result.append(x)
-        result.extend(listDescendantsInUITreeNode(x))
+        _c = x.children
+        if _c:
+            stack.extend(reversed(_c))
     return result
 
 # listDescendantsInUITreeNode : UITreeNode -> List UITreeNode
@@ -3167,14 +3512,20 @@ def listDescendantsInUITreeNode(parent: UITreeNode) -> List[UITreeNode]:
 
 
 def listDescendantsWithDisplayRegion(parent: UITreeNodeWithDisplayRegion) -> List[UITreeNodeWithDisplayRegion]:
+    if type(parent) is UITreeStoreNodeWithDisplayRegion:
+        return parent.listDescendants()
+    index = getattr(parent, 'treeIndex', None)
+    if index is not None:
+        return index.descendants(parent)
     result = []
-    # print("listDecesnatsWithDisplayRegion")
-    # pprint(parent)
-    for child in listChildrenWithDisplayRegion(parent):
-        # print("Child Address: ", child.uiNode.pythonObjectAddress)
+    stack = listChildrenWithDisplayRegion(parent)
+    stack.reverse()
+    while len(stack) > 0:
+        child = stack.pop()
         result.append(child)
-        result.extend(listDescendantsWithDisplayRegion(child))
-    # print("ListDescendantsWithDisplayRegion :", result)
+        _c = child.children
+        if _c:
+            stack.extend(x for x in reversed(_c) if type(x) == UITreeNodeWithDisplayRegion)
     return result
 
 # listDescendantsWithDisplayRegion : UITreeNodeWithDisplayRegion -> List UITreeNodeWithDisplayRegion
@@ -3184,8 +3535,60 @@ def listDescendantsWithDisplayRegion(parent: UITreeNodeWithDisplayRegion) -> Lis
 #         |> List.concatMap (\child -> child :: listDescendantsWithDisplayRegion child)
 
 
+def listDescendantsWithDisplayRegionOfType(parent: UITreeNodeWithDisplayRegion, pythonObjectTypeName: str) -> List[UITreeNodeWithDisplayRegion]:
+    # Same as filtering listDescendantsWithDisplayRegion on the type name, but
+    #  answered from the frame's type index when there is one.
+    if type(parent) is UITreeStoreNodeWithDisplayRegion:
+        return [UITreeStoreNodeWithDisplayRegion(parent.store, x) for x in parent.store.rowsOfType(pythonObjectTypeName, parent.row)]
+    index = getattr(parent, 'treeIndex', None)
+    if index is not None:
+        return index.descendantsOfType(pythonObjectTypeName, parent)
+    return [x for x in listDescendantsWithDisplayRegion(parent) if x.uiNode.pythonObjectTypeName == pythonObjectTypeName]
+
+
+def listDescendantsWithDisplayRegionWithName(parent: UITreeNodeWithDisplayRegion, name: str, ignoreCase: bool = False) -> List[UITreeNodeWithDisplayRegion]:
+    index = getattr(parent, 'treeIndex', None)
+    if index is not None:
+        return index.descendantsWithName(name, parent, ignoreCase)
+    if ignoreCase:
+        name = name.lower()
+        return [x for x in listDescendantsWithDisplayRegion(parent) if (getNameFromDictEntries(x.uiNode) or '').lower() == name]
+    return [x for x in listDescendantsWithDisplayRegion(parent) if getNameFromDictEntries(x.uiNode) == name]
+
+
+def listDescendantsWithDisplayRegionWithNameContaining(parent: UITreeNodeWithDisplayRegion, text: str) -> List[UITreeNodeWithDisplayRegion]:
+    # Case insensitive.
+    index = getattr(parent, 'treeIndex', None)
+    if index is not None:
+        return index.descendantsWithNameContaining(text, parent)
+    text = text.lower()
+    return [x for x in listDescendantsWithDisplayRegion(parent) if text in (getNameFromDictEntries(x.uiNode) or '').lower()]
+
+
+def listDescendantsWithDisplayRegionWithHint(parent: UITreeNodeWithDisplayRegion, hint: Optional[str] = None) -> List[UITreeNodeWithDisplayRegion]:
+    # Without a hint, all descendants that have one.
+    index = getattr(parent, 'treeIndex', None)
+    if index is not None:
+        return index.descendantsWithHint(hint, parent)
+    if hint is None:
+        return [x for x in listDescendantsWithDisplayRegion(parent) if getHintTextFromDictEntries(x.uiNode) is not None]
+    return [x for x in listDescendantsWithDisplayRegion(parent) if getHintTextFromDictEntries(x.uiNode) == hint]
+
+
+def listChildrenWithDisplayRegionWithName(parent: UITreeNodeWithDisplayRegion, name: str, ignoreCase: bool = False) -> List[UITreeNodeWithDisplayRegion]:
+    index = getattr(parent, 'treeIndex', None)
+    if index is not None:
+        return [x for x in index.descendantsWithName(name, parent, ignoreCase) if index.parent[x.position] == parent.position]
+    if ignoreCase:
+        name = name.lower()
+        return [x for x in listChildrenWithDisplayRegion(parent) if (getNameFromDictEntries(x.uiNode) or '').lower() == name]
+    return [x for x in listChildrenWithDisplayRegion(parent) if getNameFromDictEntries(x.uiNode) == name]
+
+
 def listChildrenWithDisplayRegion(parent: UITreeNodeWithDisplayRegion) -> List[UITreeNodeWithDisplayRegion]:
     # print("Child Nodes: ", parent.children)
+    if type(parent) is UITreeStoreNodeWithDisplayRegion:
+        return parent.children or []
     d = parent.children or []
     # print("D: ", [type(child) for child in d])
     return [child for child in d if type(child) == UITreeNodeWithDisplayRegion]
@@ -3202,3 +3605,110 @@ def listChildrenWithDisplayRegion(parent: UITreeNodeWithDisplayRegion) -> List[U
 #                     ChildWithRegion childWithRegion ->
 #                         Just childWithRegion
 #             )
+
+
+def iterDescendants(parent: UITreeNodeWithDisplayRegion, predicate: Optional[Callable[[UITreeNodeWithDisplayRegion], bool]] = None, maxDepth: Optional[int] = None, ofTypes: Optional[Iterable[str]] = None) -> Iterator[UITreeNodeWithDisplayRegion]:
+    # Lazy counterpart of listDescendantsWithDisplayRegion, same pre-order.
+    #  Stops walking as soon as the caller stops iterating. With maxDepth 1
+    #  only the children are visited. ofTypes restricts the result to those
+    #  type names; on indexed trees branches without them are skipped whole.
+    index = getattr(parent, 'treeIndex', None)
+    if ofTypes is not None:
+        ofTypes = frozenset(ofTypes)
+    mask = None if index is None or ofTypes is None else index.typeMask(ofTypes)
+    if mask == 0:
+        return
+
+    def matches(x: UITreeNodeWithDisplayRegion) -> bool:
+        return (ofTypes is None or x.uiNode.pythonObjectTypeName in ofTypes) and (predicate is None or predicate(x))
+
+    if index is not None and maxDepth is None:
+        nodes = index.nodes
+        subtreeEnd = index.subtreeEnd
+        subtreeTypes = index.subtreeTypes
+        position = parent.position + 1
+        end = subtreeEnd[parent.position]
+        while position < end:
+            if mask is not None and subtreeTypes[position] & mask == 0:
+                position = subtreeEnd[position]
+                continue
+            x = nodes[position]
+            if matches(x):
+                yield x
+            position += 1
+        return
+    stack = [(x, 1) for x in reversed(listChildrenWithDisplayRegion(parent))]
+    while len(stack) > 0:
+        x, depth = stack.pop()
+        if mask is not None and not index.subtreeContainsAnyType(x, mask):
+            continue
+        if matches(x):
+            yield x
+        if maxDepth is None or depth < maxDepth:
+            stack.extend((child, depth + 1) for child in reversed(listChildrenWithDisplayRegion(x)))
+
+
+def findFirstDescendant(parent: UITreeNodeWithDisplayRegion, predicate: Optional[Callable[[UITreeNodeWithDisplayRegion], bool]] = None, maxDepth: Optional[int] = None, ofTypes: Optional[Iterable[str]] = None) -> Optional[UITreeNodeWithDisplayRegion]:
+    return next(iterDescendants(parent, predicate, maxDepth, ofTypes), None)
+
+
+def findAllDescendants(parent: UITreeNodeWithDisplayRegion, predicate: Optional[Callable[[UITreeNodeWithDisplayRegion], bool]] = None, maxDepth: Optional[int] = None, ofTypes: Optional[Iterable[str]] = None) -> List[UITreeNodeWithDisplayRegion]:
+    return list(iterDescendants(parent, predicate, maxDepth, ofTypes))
+
+
+def getParentWithDisplayRegion(node: UITreeNodeWithDisplayRegion) -> Optional[UITreeNodeWithDisplayRegion]:
+    # Only nodes in a UITreeIndex or a UITreeStore know their parent; for
+    #  other nodes, and for the root, this is None.
+    if type(node) is UITreeStoreNodeWithDisplayRegion:
+        row = node.store.parent[node.row]
+        return None if row == NO_ROW else UITreeStoreNodeWithDisplayRegion(node.store, row)
+    index = getattr(node, 'treeIndex', None)
+    if index is None:
+        return None
+    return index.parentOf(node)
+
+
+def iterAncestors(node: UITreeNodeWithDisplayRegion) -> Iterator[UITreeNodeWithDisplayRegion]:
+    # Nearest first, ending with the root.
+    index = getattr(node, 'treeIndex', None)
+    if index is not None:
+        yield from index.ancestors(node)
+        return
+    x = getParentWithDisplayRegion(node)
+    while x is not None:
+        yield x
+        x = getParentWithDisplayRegion(x)
+
+
+def findAncestor(node: UITreeNodeWithDisplayRegion, predicate: Optional[Callable[[UITreeNodeWithDisplayRegion], bool]] = None, ofTypes: Optional[Iterable[str]] = None) -> Optional[UITreeNodeWithDisplayRegion]:
+    # E.g. the window containing a node: findAncestor(node, ofTypes=['OverView']).
+    if ofTypes is not None:
+        ofTypes = frozenset(ofTypes)
+    for x in iterAncestors(node):
+        if (ofTypes is None or x.uiNode.pythonObjectTypeName in ofTypes) and (predicate is None or predicate(x)):
+            return x
+    return None
+
+
+def findNodeWithAddress(root: UITreeNodeWithDisplayRegion, pythonObjectAddress: str) -> Optional[UITreeNodeWithDisplayRegion]:
+    # root itself or one of its descendants. A dict lookup on indexed trees.
+    index = getattr(root, 'treeIndex', None)
+    if index is not None:
+        return index.nodeWithAddress(pythonObjectAddress, root)
+    if root.uiNode.pythonObjectAddress == pythonObjectAddress:
+        return root
+    return findFirstDescendant(root, lambda x: x.uiNode.pythonObjectAddress == pythonObjectAddress)
+
+# Root node types of the window parsers run by parseUserinterfaceFromUITree.
+registerUIRootParser('shipUI', ['ShipUI'], firstNodeParser(parseShipUI))
+registerUIRootParser('targets', ['TargetInBar'], allNodesParser(parseTarget))
+registerUIRootParser('infoPanelContainer', ['InfoPanelContainer'], lambda nodes: parseInfoPanelContainer(mostPopulousNode(nodes)) if len(nodes) > 0 else None)
+registerUIRootParser('overviewWindow', ['OverView'], firstNodeParser(parseOverviewWindow))
+registerUIRootParser('selectedItemWindow', ['ActiveItem'], firstNodeParser(parseSelectedItemWindow))
+registerUIRootParser('dronesWindow', ['DroneView'], firstNodeParser(parseDronesWindow))
+registerUIRootParser('probeScannerWindow', ['ProbeScannerWindow'], firstNodeParser(parseProbeScannerWindow))
+registerUIRootParser('directionalScannerWindow', ['DirectionalScanner'], firstNodeParser(parseDirectionalScannerWindow))
+registerUIRootParser('stationWindow', ['LobbyWnd'], firstNodeParser(parseStationWindow))
+registerUIRootParser('moduleButtonTooltip', ['ModuleButtonTooltip'], firstNodeParser(parseModuleButtonTooltip))
+registerUIRootParser('chatWindowStacks', ['ChatWindowStack'], allNodesParser(parseChatWindowStack))
+registerUIRootParser('bookmarkLocationWindow', ['BookmarkLocationWindow'], firstNodeParser(parseBookmarkLocationWindow))
@@ -0,0 +1,352 @@
+import contextlib
+import gc
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from copy import copy
+from typing import Callable, Dict, List
+
+from base import *
+from loader import STREAMING_BACKEND, availableJsonBackends, loadUITreeNodeFromBytes, loadUITreeNodeStreaming
+from snapshot import UITreeSnapshot, writeUITreeSnapshotToFile
+from uitreediff import UITreeEntryChange, UITreeNodeMove, diffUITrees
+
+# Micro benchmarks for the tree building and traversal code paths.
+#  Run with `python benchmarks.py`.
+
+
+def syntheticUITreeJson(depth: int, breadth: int) -> Dict:
+    counter = [0]
+
+    def node(level: int) -> Dict:
+        counter[0] += 1
+        return {
+            "pythonObjectAddress": str(counter[0]),
+            "pythonObjectTypeName": "Container" if level < depth else "EveLabelMedium",
+            "dictEntriesOfInterest": {
+                "_displayX": counter[0] % 17,
+                "_displayY": {"int_low32": counter[0] % 11},
+                "_displayWidth": 100,
+                "_displayHeight": 20,
+                "_name": "node%d" % (counter[0] % 50),
+                "_setText": "text %d" % counter[0],
+            },
+            "otherDictEntriesKeys": ["_left", "_top"],
+            "children": [node(level + 1) for _ in range(breadth)] if level < depth else None,
+        }
+    return node(0)
+
+
+def chatWindowStackUITreeJson(users: int, frame: int = 0) -> Dict:
+    # A UIRoot with one chat window stack, the user list holding users entries.
+    #  Their names change with frame.
+    counter = [0]
+
+    def node(typeName: str, entries: Dict, children: Optional[List[Dict]]) -> Dict:
+        counter[0] += 1
+        entries = dict({"_displayX": counter[0] % 17, "_displayY": {"int_low32": counter[0] % 11},
+                        "_displayWidth": 100, "_displayHeight": 20}, **entries)
+        return {"pythonObjectAddress": str(counter[0]), "pythonObjectTypeName": typeName,
+                "dictEntriesOfInterest": entries, "otherDictEntriesKeys": ["_left", "_top"], "children": children}
+
+    userEntries = [node("XmppChatUserEntry", {}, [node("EveLabelMedium", {"_setText": "User %d" % (i + frame)}, None),
+                                                 node("FlagIconWithState", {"_hint": "Good standing"}, [])])
+                   for i in range(users)]
+    userlist = node("Container", {"_name": "userlist"}, userEntries)
+    window = node("XmppChatWindow", {"_name": "chatchannel_local"}, [userlist])
+    layer = node("LayerCore", {"_name": "l_main"}, [node("ChatWindowStack", {}, [window])])
+    return node("UIRoot", {}, [layer])
+
+
+def deepUITreeJson(depth: int) -> Dict:
+    data = {"pythonObjectAddress": "0", "pythonObjectTypeName": "Container",
+            "dictEntriesOfInterest": {"_displayX": 1, "_displayY": 1}, "children": None}
+    for i in range(1, depth):
+        data = {"pythonObjectAddress": str(i), "pythonObjectTypeName": "Container",
+                "dictEntriesOfInterest": {"_displayX": 1, "_displayY": 1}, "children": [data]}
+    return data
+
+
+# The recursive implementations the explicit-stack versions in base.py replaced,
+#  kept here as the reference to compare against.
+
+def fromJsonRecursive(data: Dict) -> UITreeNode:
+    x = UITreeNode(**data)
+    ingestUITreeNode(x)
+    _c = data.get("children")
+    x.children = None if _c is None else [fromJsonRecursive(x) for x in _c]
+    return x
+
+
+def fromJsonInterningAllEntries(data: Dict) -> UITreeNode:
+    # UITreeNode.fromJson as it was when every dict entry was interned at
+    #  load, rebuilding each node's dictEntriesOfInterest.
+    root = UITreeNode(**data)
+    stack = [(root, data)]
+    while len(stack) > 0:
+        x, xData = stack.pop()
+        ingestUITreeNode(x)
+        x.dictEntriesOfInterest = internDictEntries(x.dictEntriesOfInterest)
+        x.otherDictEntriesKeys = [internString(y) for y in x.otherDictEntriesKeys]
+        _c = xData.get("children")
+        x.children = None if _c is None else [UITreeNode(**y) for y in _c]
+        stack.extend(zip(x.children or [], _c or []))
+    return root
+
+
+def asUITreeNodeWithDisplayRegionRecursive(selfDisplayRegion: DisplayRegion, totalDisplayRegion: DisplayRegion, uiNode: UITreeNode) -> UITreeNodeWithDisplayRegion:
+    x = UITreeNodeWithDisplayRegion()
+    x.uiNode = uiNode
+    dr = Location2d()
+    dr.x = totalDisplayRegion.x
+    dr.y = totalDisplayRegion.y
+    x.children = [asUITreeNodeWithInheritedOffsetRecursive(dr, x) for x in uiNode.children if x is not None] if uiNode.children is not None else None
+    x.selfDisplayRegion = selfDisplayRegion
+    x.totalDisplayRegion = totalDisplayRegion
+    return x
+
+
+def asUITreeNodeWithInheritedOffsetRecursive(inheritedOffset: Location2d, rawNode: UITreeNode) -> UITreeNodeWithDisplayRegion:
+    selfRegion = getDisplayRegionFromDictEntries(rawNode)
+    a = copy(selfRegion)
+    a.x += (inheritedOffset.x or 0)
+    a.y += (inheritedOffset.y or 0)
+    return asUITreeNodeWithDisplayRegionRecursive(selfRegion, a, rawNode)
+
+
+def parseUITreeWithDisplayRegionFromUITreeRecursive(uiTree: UITreeNode) -> UITreeNodeWithDisplayRegion:
+    selfDisplayRegion = getDisplayRegionFromDictEntries(uiTree)
+    return asUITreeNodeWithDisplayRegionRecursive(selfDisplayRegion, selfDisplayRegion, uiTree)
+
+
+def listDescendantsInUITreeNodeRecursive(parent: UITreeNode) -> List[UITreeNode]:
+    result: List[UITreeNode] = []
+    for x in parent.children or []:
+        result.append(x)
+        result.extend(listDescendantsInUITreeNodeRecursive(x))
+    return result
+
+
+def listDescendantsWithDisplayRegionRecursive(parent: UITreeNodeWithDisplayRegion) -> List[UITreeNodeWithDisplayRegion]:
+    result = []
+    for child in listChildrenWithDisplayRegion(parent):
+        result.append(child)
+        result.extend(listDescendantsWithDisplayRegionRecursive(child))
+    return result
+
+
+def regionTreeSignature(node: UITreeNodeWithDisplayRegion) -> List:
+    return [(x.uiNode.pythonObjectAddress, x.selfDisplayRegion.x, x.selfDisplayRegion.y, x.totalDisplayRegion.x, x.totalDisplayRegion.y)
+            for x in [node] + listDescendantsWithDisplayRegion(node)]
+
+
+def timeIt(fn: Callable, repeat: int = 5) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def report(name: str, recursive: Optional[float], iterative: float):
+    recursiveText = "recursion limit" if recursive is None else "%8.2f ms" % (recursive * 1000)
+    print("  %-40s recursive %s   iterative %8.2f ms" % (name, recursiveText, iterative * 1000))
+
+
+def benchmarkTreeConstruction(label: str, data: Dict):
+    uiTree = UITreeNode.fromJson(data)
+    withRegion = parseUITreeWithDisplayRegionFromUITree(uiTree)
+    print("%s: %d nodes" % (label, len(listDescendantsInUITreeNode(uiTree)) + 1))
+
+    def attempt(fn: Callable) -> Optional[float]:
+        try:
+            return timeIt(fn)
+        except RecursionError:
+            return None
+
+    recursiveFromJson = attempt(lambda: fromJsonRecursive(data))
+    if recursiveFromJson is not None:
+        assert regionTreeSignature(parseUITreeWithDisplayRegionFromUITreeRecursive(fromJsonRecursive(data))) == regionTreeSignature(withRegion)
+        assert [x.pythonObjectAddress for x in listDescendantsInUITreeNodeRecursive(uiTree)] == [x.pythonObjectAddress for x in listDescendantsInUITreeNode(uiTree)]
+
+    report("UITreeNode.fromJson", recursiveFromJson, timeIt(lambda: UITreeNode.fromJson(data)))
+    report("parseUITreeWithDisplayRegionFromUITree", attempt(lambda: parseUITreeWithDisplayRegionFromUITreeRecursive(uiTree)),
+           timeIt(lambda: parseUITreeWithDisplayRegionFromUITree(uiTree)))
+    report("listDescendantsInUITreeNode", attempt(lambda: listDescendantsInUITreeNodeRecursive(uiTree)),
+           timeIt(lambda: listDescendantsInUITreeNode(uiTree)))
+    report("listDescendantsWithDisplayRegion", attempt(lambda: listDescendantsWithDisplayRegionRecursive(withRegion)),
+           timeIt(lambda: listDescendantsWithDisplayRegion(withRegion)))
+
+
+def benchmarkInterning(label: str, data: Dict):
+    print("%s: UITreeNode.fromJson" % label)
+    print("  %-40s every entry %8.2f ms   type names %8.2f ms   projected %8.2f ms" % (
+        "interning", timeIt(lambda: fromJsonInterningAllEntries(data)) * 1000, timeIt(lambda: UITreeNode.fromJson(data)) * 1000,
+        timeIt(lambda: UITreeNode.fromJson(data, dictEntriesProjection())) * 1000))
+
+
+def benchmarkLazyChildren(label: str, data: Dict):
+    def topLayers(lazy: bool) -> List[str]:
+        root = parseUITreeWithDisplayRegionFromUITree(UITreeNode.fromJson(data, lazy=lazy), lazy)
+        return [x.uiNode.pythonObjectTypeName for x in listChildrenWithDisplayRegion(root)]
+    assert topLayers(False) == topLayers(True)
+    print("%s: load and list the top layer" % label)
+    print("  %-40s eager %8.2f ms   lazy %8.2f ms" % ("fromJson + display region pass", timeIt(lambda: topLayers(False)) * 1000, timeIt(lambda: topLayers(True)) * 1000))
+
+
+def benchmarkParseCache(label: str, raw: bytes, repeat: int = 9):
+    # Steady state: every frame is built again from the same JSON, the way a
+    #  bot reads a client that is not changing. Decoding, building and the
+    #  display region pass cost the same with or without the cache, so only
+    #  parsing is timed, on frames built beforehand. With the cache that
+    #  includes hashing the window subtrees of each new frame.
+    frames = iter([parseUITreeWithDisplayRegionFromUITree(UITreeNode.fromJson(json.loads(raw))) for _ in range(2 * repeat + 1)])
+
+    def parse(cache: Optional[UIRootParseCache]) -> ParsedUserInterface:
+        # Some of the parsers print while they work.
+        with contextlib.redirect_stdout(io.StringIO()):
+            return parseUserinterfaceFromUITree(next(frames), cache=cache)
+
+    cache = UIRootParseCache()
+    parse(cache)
+    withoutCache = timeIt(lambda: parse(None), repeat)
+    withCache = timeIt(lambda: parse(cache), repeat)
+    print("%s: parse a frame" % label)
+    print("  %-40s no cache %8.2f ms   cache %8.2f ms   (%d reused, %d parsed)" % (
+        "UIRootParseCache", withoutCache * 1000, withCache * 1000, cache.reused, cache.parsed))
+
+
+class ParseResultCacheKeepingFrames(ParseResultCache):
+    # ParseResultCache as it was before entries were evicted on frame turnover.
+    def evictBefore(self, generation: int):
+        pass
+
+
+def benchmarkParseCacheMemory(label: str, users: int, frames: int = 30):
+    # A small chat window that changes on every frame, next to a large part of
+    #  the UI no parser reads, parsed with a memo under a byte budget. What
+    #  stays allocated after each frame should not grow with the number of
+    #  frames, although every memoized result refers into its frame.
+    otherLayer = syntheticUITreeJson(depth=4, breadth=8)
+
+    def retainedPerFrame(memo: ParseResultCache) -> List[int]:
+        cache = UIRootParseCache(memo=memo)
+        result = []
+        tracemalloc.start()
+        try:
+            for i in range(frames):
+                data = chatWindowStackUITreeJson(users, i)
+                data["children"].append(otherLayer)
+                uiTree = parseUITreeWithDisplayRegionFromUITree(UITreeNode.fromJson(data))
+                with contextlib.redirect_stdout(io.StringIO()):
+                    parseUserinterfaceFromUITree(uiTree, cache=cache)
+                del uiTree
+                gc.collect()
+                result.append(tracemalloc.get_traced_memory()[0])
+        finally:
+            tracemalloc.stop()
+        return result
+
+    print("%s: %d frames, memo budget 1 MB, retained after frame 1, %d and %d" % (label, frames, frames // 2, frames))
+    for name, memo in (("evicting on frame turnover", ParseResultCache(maxBytes=1000000)),
+                       ("keeping frames", ParseResultCacheKeepingFrames(maxBytes=1000000))):
+        retained = retainedPerFrame(memo)
+        print("  %-40s %8.1f MB %8.1f MB %8.1f MB   (memo %d entries, %.1f KB)" % (
+            name, retained[0] / 1e6, retained[frames // 2 - 1] / 1e6, retained[-1] / 1e6, len(memo), memo.bytes / 1e3))
+
+
+def checkDiffUITrees():
+    # diffUITrees on small edits of one tree: r holds a, b and c, and a holds d.
+    def node(address: str, children: Optional[List[Dict]] = None, displayX: int = 1) -> Dict:
+        return {"pythonObjectAddress": address, "pythonObjectTypeName": "Container",
+                "dictEntriesOfInterest": {"_displayX": displayX, "_name": address}, "children": children}
+
+    def tree(**edits) -> UITreeNode:
+        nodes = {x: node(x) for x in "abcde"}
+        nodes["b"]["dictEntriesOfInterest"]["_displayX"] = edits.get("bDisplayX", -1)
+        nodes[edits.get("dParent", "a")]["children"] = [nodes["d"]]
+        return UITreeNode.fromJson(node("r", [nodes[x] for x in edits.get("order", "abc")]))
+
+    def addresses(nodes: List[UITreeNode]) -> List[str]:
+        return sorted(x.pythonObjectAddress for x in nodes)
+
+    unchanged = diffUITrees(tree(), tree())
+    assert unchanged == ([], [], [], []), unchanged
+
+    inserted = diffUITrees(tree(), tree(order="eabc"))
+    assert addresses(inserted.added) == ["e"] and inserted.removed == [], inserted
+    # a, b and c keep their order, so none of them moved.
+    assert inserted.moved == [] and inserted.changed == [], inserted
+
+    swapped = diffUITrees(tree(), tree(order="bac"))
+    assert swapped.added == [] and swapped.removed == [] and swapped.changed == [], swapped
+    assert swapped.moved == [UITreeNodeMove("b", "r", "r", 1, 0)], swapped
+
+    reparented = diffUITrees(tree(), tree(dParent="c"))
+    assert reparented.added == [] and reparented.removed == [] and reparented.changed == [], reparented
+    assert reparented.moved == [UITreeNodeMove("d", "a", "c", 0, 0)], reparented
+
+    changed = diffUITrees(tree(), tree(bDisplayX=-2))
+    assert changed.added == [] and changed.removed == [] and changed.moved == [], changed
+    assert changed.changed == [UITreeEntryChange("b", "_displayX", -1, -2)], changed
+    print("diffUITrees: insert, swap, move to another parent and entry change as expected")
+
+
+def peakMemory(fn: Callable) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmarkJsonDecode(label: str, raw: bytes):
+    print("%s: %.1f MB of JSON" % (label, len(raw) / 1e6))
+    loaders = {name: (lambda name=name: loadUITreeNodeFromBytes(raw, backend=name)) for name in availableJsonBackends()}
+    loaders[STREAMING_BACKEND] = lambda: loadUITreeNodeStreaming(io.BytesIO(raw))
+    for name, backend in availableJsonBackends().items():
+        print("  %-12s decode      %8.2f ms   peak %8.1f MB" % (name, timeIt(lambda: backend.loads(raw), 3) * 1000, peakMemory(lambda: backend.loads(raw)) / 1e6))
+    for name, load in loaders.items():
+        print("  %-12s UITreeNode  %8.2f ms   peak %8.1f MB" % (name, timeIt(load, 3) * 1000, peakMemory(load) / 1e6))
+
+
+def benchmarkSnapshotLoad(label: str, raw: bytes):
+    path = os.path.join(tempfile.mkdtemp(), 'frame.euis')
+    writeUITreeSnapshotToFile(loadUITreeNodeFromBytes(raw), path)
+    print("%s: %.1f MB of JSON, %.1f MB snapshot" % (label, len(raw) / 1e6, os.path.getsize(path) / 1e6))
+
+    def fromSnapshot():
+        with UITreeSnapshot(path) as snapshot:
+            return parseUITreeWithDisplayRegionFromUITree(snapshot.root())
+    print("  %-40s json %8.2f ms   snapshot %8.2f ms" % ("load + display region pass",
+          timeIt(lambda: parseUITreeWithDisplayRegionFromUITree(loadUITreeNodeFromBytes(raw)), 3) * 1000, timeIt(fromSnapshot, 3) * 1000))
+    os.remove(path)
+
+
+if __name__ == '__main__':
+    checkDiffUITrees()
+    # Memory reading snapshots given on the command line are used for the decode benchmark.
+    snapshotPaths = sys.argv[1:]
+    for path in snapshotPaths:
+        with open(path, 'rb') as fp:
+            raw = fp.read()
+        benchmarkJsonDecode(path, raw)
+        benchmarkSnapshotLoad(path, raw)
+    if len(snapshotPaths) == 0:
+        raw = json.dumps(syntheticUITreeJson(depth=5, breadth=8)).encode()
+        benchmarkJsonDecode("synthetic snapshot", raw)
+        benchmarkSnapshotLoad("synthetic snapshot", raw)
+    benchmarkTreeConstruction("wide tree", syntheticUITreeJson(depth=5, breadth=8))
+    benchmarkTreeConstruction("deep tree", deepUITreeJson(300))
+    benchmarkTreeConstruction("very deep tree", deepUITreeJson(sys.getrecursionlimit() * 4))
+    benchmarkInterning("wide tree", syntheticUITreeJson(depth=5, breadth=8))
+    benchmarkLazyChildren("wide tree", syntheticUITreeJson(depth=5, breadth=8))
+    benchmarkParseCache("chat window stack", json.dumps(chatWindowStackUITreeJson(1500)).encode())
+    benchmarkParseCacheMemory("changing chat window stack", 20)
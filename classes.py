@@ -1,6 +1,9 @@
 
+import hashlib
+import json
+import sys
 from enum import Enum
-from typing import Any, Dict, List, NamedTuple, Optional, Set, Union
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple, Union
 
 
 # Not Sure what this means at the common. Will need to check into it.
@@ -15,44 +18,277 @@ UITreeNodeChild = None  # UITreeNode. # Reinit after to help class defs.
 
 
 class UITreeNode(object):
-    def __init__(self, **kwargs):
-        self.__dict__.update(kwargs)
+    # Fixed slots instead of a per-instance __dict__; snapshots run to tens of
+    #  thousands of nodes. Unknown keys from the memory reading are dropped.
+    __slots__ = ('pythonObjectAddress', 'pythonObjectTypeName',
+                 'dictEntriesOfInterest', 'otherDictEntriesKeys', 'children',
+                 'displayRegionValues', '_lazyChildren', '_subtreeHash')
+
+    def __init__(self, **kwargs):
+        for key, value in kwargs.items():
+            if key in _UITreeNodeFields:
+                setattr(self, key, value)
+
+    def __getattr__(self, name: str) -> Any:
+        # Only reached while a slot is unset: with fromJson(lazy=True) the
+        #  children stay raw JSON until they are first asked for.
+        if name != 'children':
+            raise AttributeError(name)
+        try:
+            rawChildren, projection = self._lazyChildren
+        except AttributeError:
+            raise AttributeError(name) from None
+        del self._lazyChildren
+        self.children = [UITreeNodeChild.fromJson(x, projection, True) for x in rawChildren]
+        return self.children
 
     @staticmethod
-    def fromJson(data: Dict) -> object:
-        x = UITreeNode(**data)
-        _c = data.get("children")
-        x.children = None if _c is None else [UITreeNodeChild.fromJson(x) for x in _c]
-        return x
+    def fromJson(data: Dict, projection: Optional[FrozenSet[str]] = None, lazy: bool = False) -> object:
+        root = UITreeNode(**data)
+        ingestUITreeNode(root, projection)
+        if lazy:
+            _c = data.get("children")
+            if _c is None:
+                root.children = None
+            else:
+                del root.children
+                root._lazyChildren = (_c, projection)
+            return root
+        # Explicit stack of (node, JSON children) so deep trees don't recurse.
+        stack = [(root, data.get("children"))]
+        while len(stack) > 0:
+            x, _c = stack.pop()
+            if _c is None:
+                x.children = None
+                continue
+            children = []
+            for childData in _c:
+                child = UITreeNodeChild(**childData)
+                ingestUITreeNode(child, projection)
+                children.append(child)
+                stack.append((child, childData.get("children")))
+            x.children = children
+        return root
+
+    def subtreeHash(self, projection: Optional[FrozenSet[str]] = None) -> bytes:
+        # See uiTreeNodeSubtreeHash.
+        return uiTreeNodeSubtreeHash(self, projection)
 
-    origionalJson: Any
     pythonObjectAddress: str
     pythonObjectTypeName: str
     dictEntriesOfInterest: Dict[str, Any]
+    otherDictEntriesKeys: List[str]
     children: Optional[List[UITreeNodeChild]]
+    # x, y, width, height decoded once at ingest, see ingestUITreeNode.
+    displayRegionValues: Tuple[Optional[int], Optional[int], Optional[int], Optional[int]]
+
+
+_UITreeNodeFields = frozenset(('pythonObjectAddress', 'pythonObjectTypeName',
+                               'dictEntriesOfInterest', 'otherDictEntriesKeys', 'children'))
+
+
+# Type names, dict entry keys and short values such as '_name' repeat across
+#  every node and frame. They go through the process-wide intern table so
+#  each distinct string is stored once and comparisons hit the identity check.
+#  Type names are interned for every node. The entries are only interned when
+#  a projection is given, as filtering rebuilds them anyway; rebuilding every
+#  dict just to intern it made loading about three times slower, and the JSON
+#  decoders already share repeated keys within a document.
+INTERN_MAX_LENGTH = 64
+
+
+def internString(s: Any) -> Any:
+    if type(s) is str and len(s) <= INTERN_MAX_LENGTH:
+        return sys.intern(s)
+    return s
+
+
+def internDictEntries(entries: Dict[str, Any], projection: Optional[FrozenSet[str]] = None) -> Dict[str, Any]:
+    result = {}
+    for key, value in entries.items():
+        if projection is not None and key not in projection:
+            continue
+        if type(value) is dict:
+            value = internDictEntries(value)
+        else:
+            value = internString(value)
+        result[sys.intern(key)] = value
+    return result
+
+
+def internUITreeNodeStrings(node: UITreeNode, projection: Optional[FrozenSet[str]] = None) -> UITreeNode:
+    node.pythonObjectTypeName = internString(node.pythonObjectTypeName)
+    if projection is not None:
+        entries = getattr(node, 'dictEntriesOfInterest', None)
+        if entries is not None:
+            node.dictEntriesOfInterest = internDictEntries(entries, projection)
+    return node
+
+
+# Keys of dictEntriesOfInterest the parsers read. Pass dictEntriesProjection()
+#  as the projection when loading to drop every other entry while the tree
+#  is built.
+_dictEntryKeysInUse: Set[str] = set()
+_dictEntriesProjection: Optional[FrozenSet[str]] = None
+
+
+def registerDictEntryKeys(*keys: str) -> None:
+    global _dictEntriesProjection
+    _dictEntryKeysInUse.update(sys.intern(x) for x in keys)
+    _dictEntriesProjection = None
+
+
+def dictEntriesProjection() -> FrozenSet[str]:
+    # The same frozenset until more keys are registered.
+    global _dictEntriesProjection
+    if _dictEntriesProjection is None:
+        _dictEntriesProjection = frozenset(_dictEntryKeysInUse)
+    return _dictEntriesProjection
+
+
+registerDictEntryKeys("_displayX", "_displayY", "_displayWidth", "_displayHeight")
 
 
 # class UITreeNodeChild(Enum):
 UITreeNodeChild = UITreeNode
 
 
+# Merkle hash of a subtree: blake2b over the type name, the dict entries in
+#  the projection (dictEntriesProjection() by default) and the hashes of the
+#  children in order. Addresses are left out, so equal content hashes equal
+#  in any frame. Equal hashes mean the parsers read the same values below the
+#  node; the position on screen still depends on the ancestors.
+#
+#  Entries are encoded as JSON with sorted keys, which keeps the types of the
+#  values apart: 1, 1.0 and true differ, and so do a dict and a list of pairs.
+#  Hashes are computed on first use, not while a tree is loaded.
+SUBTREE_HASH_SIZE = 16
+
+_encodeEntries = json.JSONEncoder(sort_keys=True, separators=(',', ':'), check_circular=False).encode
+
+
+def _nodeHash(node: UITreeNode, childHashes: Optional[List[bytes]], projection: FrozenSet[str]) -> bytes:
+    entries = {k: v for k, v in node.dictEntriesOfInterest.items() if k in projection}
+    # The JSON array ends unambiguously and child hashes have a fixed size.
+    h = hashlib.blake2b(_encodeEntries([node.pythonObjectTypeName, entries, childHashes is None]).encode(),
+                        digest_size=SUBTREE_HASH_SIZE)
+    if childHashes:
+        h.update(b''.join(childHashes))
+    return h.digest()
+
+
+def computeSubtreeHashes(root: UITreeNode, projection: Optional[FrozenSet[str]] = None) -> Dict[int, bytes]:
+    # One bottom-up pass; id(node) -> hash for root and the descendants hashed
+    #  on the way. UITreeNode instances keep their hash with its projection,
+    #  so subtrees hashed before are not entered and only their top node is
+    #  in the result. Other node types, e.g. snapshot or store views, are
+    #  always hashed.
+    if projection is None:
+        projection = dictEntriesProjection()
+    result: Dict[int, bytes] = {}
+    # (node, its children, whether they are hashed already). Views create new
+    #  child objects on every access, so the children are read once and kept
+    #  on the stack until the parent is hashed.
+    stack = [(root, None, False)]
+    while len(stack) > 0:
+        node, children, childrenDone = stack.pop()
+        if not childrenDone:
+            cached = getattr(node, '_subtreeHash', None) if type(node) is UITreeNode else None
+            if cached is not None and (cached[0] is projection or cached[0] == projection):
+                result[id(node)] = cached[1]
+                continue
+            children = node.children
+            if children is not None:
+                children = [x for x in children if x is not None]
+            if children:
+                stack.append((node, children, True))
+                stack.extend((x, None, False) for x in reversed(children))
+                continue
+        digest = _nodeHash(node, None if children is None else [result[id(x)] for x in children], projection)
+        result[id(node)] = digest
+        if type(node) is UITreeNode:
+            node._subtreeHash = (projection, digest)
+    return result
+
+
+def uiTreeNodeSubtreeHash(node: UITreeNode, projection: Optional[FrozenSet[str]] = None) -> bytes:
+    return computeSubtreeHashes(node, projection)[id(node)]
+
+
 class DisplayRegion(object):
+    __slots__ = ('x', 'y', 'width', 'height')
+
     def __init__(self, **kwargs):
-        self.__dict__.update(kwargs)
+        for key, value in kwargs.items():
+            setattr(self, key, value)
     x: int
     y: int
     width: int
     height: int
 
 
+def fixedNumberFromJsonValue(val: Union[int, str]) -> Optional[int]:
+    if type(val) is int:
+        return val
+    else:
+        try:
+            if val is None:
+                return 0
+            if type(val) is dict:
+                return int(val.get("int_low32"))
+            return int(val)
+        except Exception:
+            # Runs for every node at ingest; values that are not numbers
+            #  just have no region.
+            return None
+
+
+def displayRegionFromDictEntries(dictEntriesOfInterest: Dict[str, Any]) -> DisplayRegion:
+    dr = DisplayRegion()
+    dr.x = fixedNumberFromJsonValue(dictEntriesOfInterest.get("_displayX"))
+    dr.y = fixedNumberFromJsonValue(dictEntriesOfInterest.get("_displayY"))
+    dr.width = fixedNumberFromJsonValue(dictEntriesOfInterest.get("_displayWidth"))
+    dr.height = fixedNumberFromJsonValue(dictEntriesOfInterest.get("_displayHeight"))
+    return dr
+
+
+def ingestUITreeNode(node: UITreeNode, projection: Optional[FrozenSet[str]] = None) -> UITreeNode:
+    # Decodes the display coordinates while the raw entries are at hand, so
+    #  later geometry lookups are plain field reads.
+    entries = getattr(node, 'dictEntriesOfInterest', None)
+    if entries is not None:
+        node.displayRegionValues = (
+            fixedNumberFromJsonValue(entries.get("_displayX")),
+            fixedNumberFromJsonValue(entries.get("_displayY")),
+            fixedNumberFromJsonValue(entries.get("_displayWidth")),
+            fixedNumberFromJsonValue(entries.get("_displayHeight")))
+    return internUITreeNodeStrings(node, projection)
+
+
+def displayRegionFromUITreeNode(node: UITreeNode) -> DisplayRegion:
+    # Nodes that did not go through ingestUITreeNode, e.g. snapshot and store
+    #  views, are decoded from their entries.
+    values = getattr(node, 'displayRegionValues', None)
+    if values is None:
+        return displayRegionFromDictEntries(node.dictEntriesOfInterest)
+    dr = DisplayRegion()
+    dr.x, dr.y, dr.width, dr.height = values
+    return dr
+
+
 # class ChildOfNodeWithDisplayRegion(Enum):
 #     # UITreeNodeWithDisplayRegion # Reinit after to help class defs.
 
 
 
 class UITreeNodeWithDisplayRegion(object):
+    # treeIndex and position are set when the node is part of a UITreeIndex.
+    __slots__ = ('uiNode', 'children', 'selfDisplayRegion', 'totalDisplayRegion',
+                 'treeIndex', 'position')
+
     def __init__(self, **kwargs):
-        self.__dict__.update(kwargs)
+        for key, value in kwargs.items():
+            setattr(self, key, value)
     uiNode: UITreeNode
     children: Optional[List[Union[UITreeNode, Any]]]
     selfDisplayRegion: DisplayRegion
@@ -63,14 +299,53 @@ ChildWithRegion = UITreeNodeWithDisplayRegion
 
 #Defined a second time in order to init typings.
 class UITreeNodeWithDisplayRegion(object):
+    # treeIndex and position are set when the node is part of a UITreeIndex.
+    __slots__ = ('uiNode', 'children', 'selfDisplayRegion', 'totalDisplayRegion',
+                 'treeIndex', 'position')
+
     def __init__(self, **kwargs):
-        self.__dict__.update(kwargs)
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+    def __getattr__(self, name: str) -> Any:
+        # Children left unset by a lazy display region pass are built on first access.
+        if name != 'children':
+            raise AttributeError(name)
+        self.children = childrenWithInheritedOffset(self)
+        return self.children
+
     uiNode: UITreeNode
     children: Optional[List[Union[UITreeNode, UITreeNodeWithDisplayRegion]]]
     selfDisplayRegion: DisplayRegion
     totalDisplayRegion: DisplayRegion
 
 
+def uiTreeNodeWithInheritedOffset(offsetX: int, offsetY: int, rawNode: UITreeNode) -> Union[UITreeNodeWithDisplayRegion, UITreeNode]:
+    # Leaves the children of the new node unset.
+    selfRegion = displayRegionFromUITreeNode(rawNode)
+    if selfRegion is None:
+        return rawNode
+    a = DisplayRegion()
+    a.x = selfRegion.x + offsetX
+    a.y = selfRegion.y + offsetY
+    a.width = selfRegion.width
+    a.height = selfRegion.height
+    x = UITreeNodeWithDisplayRegion()
+    x.uiNode = rawNode
+    x.selfDisplayRegion = selfRegion
+    x.totalDisplayRegion = a
+    return x
+
+
+def childrenWithInheritedOffset(parent: UITreeNodeWithDisplayRegion) -> Optional[List[Union[UITreeNode, UITreeNodeWithDisplayRegion]]]:
+    rawChildren = parent.uiNode.children
+    if rawChildren is None:
+        return None
+    offsetX = parent.totalDisplayRegion.x or 0
+    offsetY = parent.totalDisplayRegion.y or 0
+    return [uiTreeNodeWithInheritedOffset(offsetX, offsetY, x) for x in rawChildren if x is not None]
+
+
 # class ChildOfNodeWithDisplayRegion(Enum):
 #     ChildWithRegion = UITreeNodeWithDisplayRegion
 #     ChildWithoutRegion = UITreeNode
@@ -0,0 +1,138 @@
+import io
+import json
+from typing import Any, BinaryIO, Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+from classes import UITreeNode, ingestUITreeNode
+
+# ijson lets us build the tree event by event straight from the byte stream.
+#  Without it we fall back to the stdlib decoder with an object hook, which
+#  still avoids keeping a second, dict based copy of the whole tree around.
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Faster decoders, used when installed. Whole-document decoding goes through
+#  the first available entry of JSON_BACKEND_PREFERENCE.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+class JsonBackend(NamedTuple):
+    name: str
+    loads: Callable[[bytes], Any]
+
+
+JSON_BACKEND_PREFERENCE = ('orjson', 'ujson', 'json')
+
+
+def availableJsonBackends() -> Dict[str, JsonBackend]:
+    result = {}
+    if orjson is not None:
+        result['orjson'] = JsonBackend('orjson', orjson.loads)
+    if ujson is not None:
+        result['ujson'] = JsonBackend('ujson', ujson.loads)
+    result['json'] = JsonBackend('json', json.loads)
+    return result
+
+
+def getJsonBackend(name: Optional[str] = None) -> JsonBackend:
+    backends = availableJsonBackends()
+    if name is not None:
+        if name not in backends:
+            raise ValueError(f"JSON backend '{name}' is not available, choose from {list(backends)}")
+        return backends[name]
+    return [backends[x] for x in JSON_BACKEND_PREFERENCE if x in backends][0]
+
+
+def uiTreeNodeFromJsonObject(data: Dict, projection: Optional[FrozenSet[str]] = None) -> UITreeNode:
+    # Children are expected to be converted already. A missing "children"
+    #  key means no children, as in UITreeNode.fromJson.
+    node = UITreeNode(**data)
+    if 'children' not in data:
+        node.children = None
+    return ingestUITreeNode(node, projection)
+
+
+def buildUITreeNodeFromEvents(events: Iterable[Tuple[str, Any]], projection: Optional[FrozenSet[str]] = None) -> UITreeNode:
+    containers: List[Any] = []
+    keys: List[Optional[str]] = []
+    # For a map: is it a UITreeNode. For an array: is it the children of one.
+    structural: List[bool] = []
+    result = None
+
+    def addValue(value: Any):
+        nonlocal result
+        if len(containers) == 0:
+            result = value
+        elif type(containers[-1]) is list:
+            containers[-1].append(value)
+        else:
+            containers[-1][keys[-1]] = value
+
+    for event, value in events:
+        if event == 'map_key':
+            keys[-1] = value
+        elif event == 'start_map':
+            isNode = len(containers) == 0 or (
+                type(containers[-1]) is list and structural[-1])
+            containers.append({})
+            keys.append(None)
+            structural.append(isNode)
+        elif event == 'end_map':
+            data = containers.pop()
+            keys.pop()
+            isNode = structural.pop()
+            addValue(uiTreeNodeFromJsonObject(data, projection) if isNode else data)
+        elif event == 'start_array':
+            isChildren = len(containers) > 0 and type(containers[-1]) is dict and structural[-1] and keys[-1] == 'children'
+            containers.append([])
+            keys.append(None)
+            structural.append(isChildren)
+        elif event == 'end_array':
+            data = containers.pop()
+            keys.pop()
+            structural.pop()
+            addValue(data)
+        else:
+            addValue(value)
+    return result
+
+
+def loadUITreeNodeStreaming(fp: BinaryIO, projection: Optional[FrozenSet[str]] = None) -> UITreeNode:
+    if ijson is not None:
+        return buildUITreeNodeFromEvents(ijson.basic_parse(fp, use_float=True), projection)
+
+    def objectHook(data: Dict) -> Any:
+        if 'pythonObjectTypeName' in data and 'pythonObjectAddress' in data:
+            return uiTreeNodeFromJsonObject(data, projection)
+        return data
+    return json.load(fp, object_hook=objectHook)
+
+
+# Pass STREAMING_BACKEND as the backend to build the tree from parse events
+#  instead of decoding the whole document first. It is the default for file
+#  loads: on large snapshots it peaks at well under the memory of a whole
+#  document decode and is no slower.
+STREAMING_BACKEND = 'streaming'
+
+
+def loadUITreeNodeFromBytes(raw: bytes, projection: Optional[FrozenSet[str]] = None, backend: Optional[str] = None, lazy: bool = False) -> UITreeNode:
+    if backend == STREAMING_BACKEND:
+        return loadUITreeNodeStreaming(io.BytesIO(raw), projection)
+    return UITreeNode.fromJson(getJsonBackend(backend).loads(raw), projection, lazy)
+
+
+def loadUITreeNodeFromFile(path: str, projection: Optional[FrozenSet[str]] = None, backend: Optional[str] = STREAMING_BACKEND) -> UITreeNode:
+    # backend None picks the first available decoder of JSON_BACKEND_PREFERENCE.
+    with open(path, 'rb') as fp:
+        if backend == STREAMING_BACKEND:
+            return loadUITreeNodeStreaming(fp, projection)
+        return loadUITreeNodeFromBytes(fp.read(), projection, backend)
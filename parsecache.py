@@ -0,0 +1,118 @@
+import sys
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from classes import UITreeNode, UITreeNodeWithDisplayRegion
+from snapshot import UITreeSnapshotNode
+from uitreestore import UITreeStoreNode, UITreeStoreNodeWithDisplayRegion
+
+# Bounded least recently used cache from a content key, e.g. the subtree hash
+#  of a window's root node, to the parsed result of that window. Used through
+#  UIRootParseCache(memo=...) in base.py, it lets windows that reappear with
+#  the same content skip parsing even under a new address.
+#
+#  The byte budget is checked against estimateParsedSize, the size of the
+#  parsed objects themselves. The UI tree nodes they refer to are not counted
+#  but are kept alive by the cache, along with the rest of their frame, which
+#  is far larger. Entries are stamped with the generation current when they
+#  were put, e.g. the frame they were parsed from, and evictBefore drops the
+#  ones of older generations. UIRootParseCache does that on every new frame,
+#  so its memo keeps no more than two frames alive.
+
+# Node types of every tree representation; the views of a store or snapshot
+#  would otherwise pull in the whole store or snapshot behind them.
+_UI_TREE_NODE_TYPES = (UITreeNode, UITreeNodeWithDisplayRegion, UITreeStoreNode,
+                       UITreeStoreNodeWithDisplayRegion, UITreeSnapshotNode)
+
+
+def estimateParsedSize(value: Any) -> int:
+    # sys.getsizeof summed over the object graph below value, stopping at UI
+    #  tree nodes and counting shared objects once.
+    seen = set()
+    total = 0
+    stack = [value]
+    while len(stack) > 0:
+        x = stack.pop()
+        if id(x) in seen or isinstance(x, _UI_TREE_NODE_TYPES):
+            continue
+        seen.add(id(x))
+        total += sys.getsizeof(x)
+        if isinstance(x, (str, bytes, int, float, bool)) or x is None:
+            continue
+        if isinstance(x, dict):
+            stack.extend(x.keys())
+            stack.extend(x.values())
+        elif isinstance(x, (list, tuple, set, frozenset)):
+            stack.extend(x)
+        else:
+            attributes = getattr(x, '__dict__', None)
+            if attributes is not None:
+                stack.append(attributes)
+            for name in getattr(type(x), '__slots__', ()):
+                if hasattr(x, name):
+                    stack.append(getattr(x, name))
+    return total
+
+
+class ParseResultCache(object):
+    def __init__(self, maxEntries: Optional[int] = 256, maxBytes: Optional[int] = None,
+                 sizeOf: Callable[[Any], int] = estimateParsedSize):
+        # None disables that budget.
+        self.maxEntries = maxEntries
+        self.maxBytes = maxBytes
+        self.sizeOf = sizeOf
+        # key -> (result, size, generation), least recently used first.
+        self.entries: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self.bytes = 0
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.entries
+
+    def hitRate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    def getOrParse(self, key: Hashable, parse: Callable[[], Any]) -> Any:
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry[0]
+        self.misses += 1
+        result = parse()
+        self.put(key, result)
+        return result
+
+    def put(self, key: Hashable, result: Any):
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.bytes -= old[1]
+        size = self.sizeOf(result) if self.maxBytes is not None else 0
+        if self.maxBytes is not None and size > self.maxBytes:
+            # Would evict everything else and still not fit.
+            return
+        self.entries[key] = (result, size, self.generation)
+        self.bytes += size
+        while (self.maxEntries is not None and len(self.entries) > self.maxEntries) or \
+                (self.maxBytes is not None and self.bytes > self.maxBytes):
+            _, (_, evictedSize, _) = self.entries.popitem(last=False)
+            self.bytes -= evictedSize
+            self.evictions += 1
+
+    def evictBefore(self, generation: int):
+        # A hit does not renew the generation of an entry: the result still
+        #  refers to what it was parsed from.
+        for key in [k for k, v in self.entries.items() if v[2] < generation]:
+            self.bytes -= self.entries.pop(key)[1]
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
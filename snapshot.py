@@ -0,0 +1,218 @@
+import json
+import mmap
+import struct
+from typing import Any, BinaryIO, Dict, List, Optional
+
+from classes import UITreeNode, internString
+
+# Compact binary format for a UITreeNode tree, meant for replaying recorded
+#  frames without parsing JSON again. All integers are little endian.
+#
+#  header    magic, version, node count, entry count, string count and the
+#            byte offsets of the sections below
+#  nodes     fixed width records in breadth first order, so the children of a
+#            node are contiguous: type name and address string ids, first
+#            entry and entry count, first child and child count, flags
+#  entries   fixed width dictEntriesOfInterest records: key string id, value
+#            kind and an 8 byte payload (int, float or string id)
+#  strings   offset table followed by the UTF-8 data of the interned strings
+#
+#  The reader maps the file and decodes a node only when it is visited.
+
+SNAPSHOT_MAGIC = b'EUIS'
+SNAPSHOT_VERSION = 1
+
+_header = struct.Struct('<4sIIIIQQQQ')
+_node = struct.Struct('<IIIIIIB3x')
+_entry = struct.Struct('<IB3xq')
+_entryFloat = struct.Struct('<IB3xd')
+_stringOffset = struct.Struct('<Q')
+
+NODE_FLAG_CHILDREN_NONE = 1
+
+ENTRY_NULL = 0
+ENTRY_BOOL = 1
+ENTRY_INT = 2
+ENTRY_FLOAT = 3
+ENTRY_STRING = 4
+# Anything else, e.g. {'int_low32': ...} or color dicts, as a JSON string.
+ENTRY_JSON = 5
+
+_INT64_MIN = -(1 << 63)
+_INT64_MAX = (1 << 63) - 1
+
+
+def writeUITreeSnapshot(uiTree: UITreeNode, fp: BinaryIO):
+    strings: List[str] = []
+    stringIds: Dict[str, int] = {}
+
+    def stringId(s: str) -> int:
+        result = stringIds.get(s)
+        if result is None:
+            result = stringIds[s] = len(strings)
+            strings.append(s)
+        return result
+
+    nodes = bytearray()
+    entries = bytearray()
+    entryCount = 0
+    # Breadth first: every node's children get consecutive indices.
+    queue = [uiTree]
+    nextIndex = 1
+    position = 0
+    while position < len(queue):
+        node = queue[position]
+        position += 1
+        firstEntry = entryCount
+        for key, value in node.dictEntriesOfInterest.items():
+            keyId = stringId(key)
+            if value is None:
+                entries += _entry.pack(keyId, ENTRY_NULL, 0)
+            elif type(value) is bool:
+                entries += _entry.pack(keyId, ENTRY_BOOL, int(value))
+            elif type(value) is int and _INT64_MIN <= value <= _INT64_MAX:
+                entries += _entry.pack(keyId, ENTRY_INT, value)
+            elif type(value) is float:
+                entries += _entryFloat.pack(keyId, ENTRY_FLOAT, value)
+            elif type(value) is str:
+                entries += _entry.pack(keyId, ENTRY_STRING, stringId(value))
+            else:
+                entries += _entry.pack(keyId, ENTRY_JSON, stringId(json.dumps(value)))
+            entryCount += 1
+        children = node.children
+        flags = NODE_FLAG_CHILDREN_NONE if children is None else 0
+        children = [x for x in children or [] if x is not None]
+        nodes += _node.pack(stringId(node.pythonObjectTypeName), stringId(node.pythonObjectAddress),
+                            firstEntry, entryCount - firstEntry, nextIndex, len(children), flags)
+        queue.extend(children)
+        nextIndex += len(children)
+
+    stringOffsets = bytearray()
+    stringData = bytearray()
+    for s in strings:
+        stringOffsets += _stringOffset.pack(len(stringData))
+        stringData += s.encode('utf-8')
+    stringOffsets += _stringOffset.pack(len(stringData))
+
+    nodesOffset = _header.size
+    entriesOffset = nodesOffset + len(nodes)
+    stringOffsetsOffset = entriesOffset + len(entries)
+    stringDataOffset = stringOffsetsOffset + len(stringOffsets)
+    fp.write(_header.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(queue), entryCount, len(strings),
+                          nodesOffset, entriesOffset, stringOffsetsOffset, stringDataOffset))
+    fp.write(nodes)
+    fp.write(entries)
+    fp.write(stringOffsets)
+    fp.write(stringData)
+
+
+def writeUITreeSnapshotToFile(uiTree: UITreeNode, path: str):
+    with open(path, 'wb') as fp:
+        writeUITreeSnapshot(uiTree, fp)
+
+
+class UITreeSnapshot(object):
+    def __init__(self, path: str):
+        self._file = open(path, 'rb')
+        self.buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.nodeCount, self.entryCount, self.stringCount, self.nodesOffset,
+         self.entriesOffset, self.stringOffsetsOffset, self.stringDataOffset) = _header.unpack_from(self.buffer, 0)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            self.close()
+            raise ValueError(f"'{path}' is not a version {SNAPSHOT_VERSION} UI tree snapshot")
+        self._strings: List[Optional[str]] = [None] * self.stringCount
+        self._jsonValues: Dict[int, Any] = {}
+
+    def __enter__(self) -> 'UITreeSnapshot':
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.buffer.close()
+        self._file.close()
+
+    def string(self, stringId: int) -> str:
+        result = self._strings[stringId]
+        if result is None:
+            start, = _stringOffset.unpack_from(self.buffer, self.stringOffsetsOffset + stringId * _stringOffset.size)
+            end, = _stringOffset.unpack_from(self.buffer, self.stringOffsetsOffset + (stringId + 1) * _stringOffset.size)
+            result = internString(str(self.buffer[self.stringDataOffset + start:self.stringDataOffset + end], 'utf-8'))
+            self._strings[stringId] = result
+        return result
+
+    def nodeRecord(self, index: int):
+        return _node.unpack_from(self.buffer, self.nodesOffset + index * _node.size)
+
+    def jsonValue(self, stringId: int) -> Any:
+        # Decoded once per snapshot and shared between nodes, like the strings.
+        if stringId not in self._jsonValues:
+            self._jsonValues[stringId] = json.loads(self.string(stringId))
+        return self._jsonValues[stringId]
+
+    def dictEntries(self, firstEntry: int, count: int) -> Dict[str, Any]:
+        result = {}
+        strings = self._strings
+        offset = self.entriesOffset + firstEntry * _entry.size
+        for keyId, kind, payload in _entry.iter_unpack(self.buffer[offset:offset + count * _entry.size]):
+            if kind == ENTRY_INT:
+                value = payload
+            elif kind == ENTRY_STRING:
+                value = strings[payload] or self.string(payload)
+            elif kind == ENTRY_JSON:
+                value = self.jsonValue(payload)
+            elif kind == ENTRY_FLOAT:
+                value = _entryFloat.unpack_from(self.buffer, offset)[2]
+            elif kind == ENTRY_BOOL:
+                value = payload != 0
+            else:
+                value = None
+            result[strings[keyId] or self.string(keyId)] = value
+            offset += _entry.size
+        return result
+
+    def root(self) -> 'UITreeSnapshotNode':
+        return UITreeSnapshotNode(self, 0)
+
+
+class UITreeSnapshotNode(object):
+    # Stands in for UITreeNode. Fields are decoded from the mapped file on
+    #  first access and then kept on the node.
+    __slots__ = ('snapshot', 'index', '_record', '_dictEntries', '_children')
+
+    def __init__(self, snapshot: UITreeSnapshot, index: int):
+        self.snapshot = snapshot
+        self.index = index
+        self._record = None
+        self._dictEntries = None
+        self._children = None
+
+    def record(self):
+        if self._record is None:
+            self._record = self.snapshot.nodeRecord(self.index)
+        return self._record
+
+    @property
+    def pythonObjectTypeName(self) -> str:
+        return self.snapshot.string(self.record()[0])
+
+    @property
+    def pythonObjectAddress(self) -> str:
+        return self.snapshot.string(self.record()[1])
+
+    @property
+    def dictEntriesOfInterest(self) -> Dict[str, Any]:
+        if self._dictEntries is None:
+            _, _, firstEntry, entryCount, _, _, _ = self.record()
+            self._dictEntries = self.snapshot.dictEntries(firstEntry, entryCount)
+        return self._dictEntries
+
+    @property
+    def children(self) -> Optional[List['UITreeSnapshotNode']]:
+        if self._children is None:
+            _, _, _, _, firstChild, childCount, flags = self.record()
+            if flags & NODE_FLAG_CHILDREN_NONE:
+                return None
+            self._children = [UITreeSnapshotNode(self.snapshot, x) for x in range(firstChild, firstChild + childCount)]
+        return self._children
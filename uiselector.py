@@ -0,0 +1,262 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from classes import UITreeNode, UITreeNodeWithDisplayRegion
+
+# A small selector language over display region trees, e.g.
+#
+#     OverView > *[type~=scroll] ScrollControls
+#     *[name=userlist] XmppChatUserEntry
+#
+#  A selector is a chain of compounds joined by ' ' (descendant) or '>' (child).
+#  A compound is a type name or '*', followed by any number of attribute tests
+#  [key op value] or [key]. Keys: type, name, hint, text, texture. Operators:
+#
+#     =   equal            *=  contains
+#     ^=  starts with      $=  ends with
+#     ~=  contains, ignoring case
+#
+#  Values may be quoted with ' or " and may contain ','. Several selectors can
+#  be joined with ','.
+#  Selectors are compiled once and cached. querySelectorsAll runs any number
+#  of them in a single walk over the tree, and on trees with a UITreeIndex the
+#  results are cached for the frame.
+
+_ATTRIBUTE_KEYS = {
+    'type': None,
+    'text': None,
+    'name': '_name',
+    'hint': '_hint',
+    'texture': 'texturePath',
+}
+
+_OPERATORS = ('~=', '*=', '^=', '$=', '=')
+
+DESCENDANT = ' '
+CHILD = '>'
+
+
+class UISelectorCompound(object):
+    __slots__ = ('pythonObjectTypeName', 'attributes')
+
+    def __init__(self, **kwargs):
+        self.pythonObjectTypeName: Optional[str] = None
+        # (key, operator, value); operator and value are None for [key].
+        self.attributes: List[Tuple[str, Optional[str], Optional[str]]] = []
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+    def matches(self, node: UITreeNodeWithDisplayRegion) -> bool:
+        uiNode = node.uiNode
+        if self.pythonObjectTypeName is not None and uiNode.pythonObjectTypeName != self.pythonObjectTypeName:
+            return False
+        for key, operator, value in self.attributes:
+            actual = _attributeValue(uiNode, key)
+            if type(actual) is not str:
+                return False
+            if operator is None:
+                continue
+            if operator == '=':
+                matched = actual == value
+            elif operator == '~=':
+                matched = value.lower() in actual.lower()
+            elif operator == '*=':
+                matched = value in actual
+            elif operator == '^=':
+                matched = actual.startswith(value)
+            else:
+                matched = actual.endswith(value)
+            if not matched:
+                return False
+        return True
+
+
+class UISelector(object):
+    # compounds[i] is joined to compounds[i - 1] by combinators[i];
+    #  combinators[0] is unused.
+    __slots__ = ('text', 'compounds', 'combinators')
+
+    def __init__(self, **kwargs):
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+    text: str
+    compounds: List[UISelectorCompound]
+    combinators: List[str]
+
+
+def _attributeValue(uiNode: UITreeNode, key: str) -> Any:
+    if key == 'type':
+        return uiNode.pythonObjectTypeName
+    entries = uiNode.dictEntriesOfInterest
+    if key == 'text':
+        # Same precedence as getDisplayText.
+        for x in ('_setText', '_text'):
+            if entries.get(x) is not None:
+                return entries.get(x)
+        return None
+    return entries.get(_ATTRIBUTE_KEYS[key])
+
+
+def _isNameCharacter(c: str) -> bool:
+    return c.isalnum() or c == '_'
+
+
+def _parseSelectors(text: str) -> List[UISelector]:
+    # One UISelector per alternative. Alternatives are split at the ','
+    #  between compounds, never inside [...] or a quoted value.
+    result: List[UISelector] = []
+    compounds: List[UISelectorCompound] = []
+    combinators: List[str] = []
+    position = 0
+    alternativeStart = 0
+    combinator = DESCENDANT
+
+    def fail(message: str):
+        raise ValueError(f"Invalid selector '{text}' at {position}: {message}")
+
+    def endAlternative():
+        if len(compounds) == 0 or combinator == CHILD:
+            fail("incomplete selector")
+        result.append(UISelector(text=text[alternativeStart:position].strip(), compounds=list(compounds), combinators=list(combinators)))
+        compounds.clear()
+        combinators.clear()
+
+    while True:
+        while position < len(text) and text[position].isspace():
+            position += 1
+        if position < len(text) and text[position] == CHILD:
+            if len(compounds) == 0 or combinator == CHILD:
+                fail("'>' needs a compound on both sides")
+            combinator = CHILD
+            position += 1
+            continue
+        if position < len(text) and text[position] == ',':
+            endAlternative()
+            combinator = DESCENDANT
+            position += 1
+            alternativeStart = position
+            continue
+        if position == len(text):
+            break
+        compound = UISelectorCompound()
+        if text[position] == '*':
+            position += 1
+        else:
+            start = position
+            while position < len(text) and _isNameCharacter(text[position]):
+                position += 1
+            if position == start:
+                fail("expected a type name or '*'")
+            compound.pythonObjectTypeName = text[start:position]
+        while position < len(text) and text[position] == '[':
+            position += 1
+            start = position
+            while position < len(text) and _isNameCharacter(text[position]):
+                position += 1
+            key = text[start:position]
+            if key not in _ATTRIBUTE_KEYS:
+                fail(f"unknown attribute '{key}'")
+            operator = next((x for x in _OPERATORS if text.startswith(x, position)), None)
+            value = None
+            if operator is not None:
+                position += len(operator)
+                if position < len(text) and text[position] in '\'"':
+                    end = text.find(text[position], position + 1)
+                    if end < 0:
+                        fail("unterminated quote")
+                    value = text[position + 1:end]
+                    position = end + 1
+                else:
+                    end = text.find(']', position)
+                    value = text[position:end if end >= 0 else len(text)].strip()
+                    position = end if end >= 0 else len(text)
+            if position >= len(text) or text[position] != ']':
+                fail("expected ']'")
+            position += 1
+            compound.attributes.append((key, operator, value))
+        if position < len(text) and not (text[position].isspace() or text[position] in (CHILD, ',')):
+            fail(f"unexpected '{text[position]}'")
+        compounds.append(compound)
+        combinators.append(combinator)
+        combinator = DESCENDANT
+    endAlternative()
+    return result
+
+
+_compiledSelectors: Dict[str, List[UISelector]] = {}
+
+
+def compileSelector(text: str) -> List[UISelector]:
+    # One UISelector per ',' separated alternative.
+    result = _compiledSelectors.get(text)
+    if result is None:
+        result = _compiledSelectors[text] = _parseSelectors(text)
+    return result
+
+
+def _regionChildren(node: UITreeNodeWithDisplayRegion) -> List[UITreeNodeWithDisplayRegion]:
+    return [x for x in node.children or [] if type(x) is not UITreeNode]
+
+
+def _runSelectors(root: UITreeNodeWithDisplayRegion, selectorTexts: List[str]) -> Dict[str, List[UITreeNodeWithDisplayRegion]]:
+    # A state (query, selector, i) on a node means compounds[i] of that selector
+    #  may match there. Descendant states are passed down the whole subtree,
+    #  child states only to the next level. Nodes are visited in pre-order, so
+    #  every result list comes out in document order.
+    queries = [(text, compileSelector(text)) for text in selectorTexts]
+    results: Dict[str, List[UITreeNodeWithDisplayRegion]] = {text: [] for text in selectorTexts}
+    resultSets = {text: set() for text in selectorTexts}
+    initial = tuple((text, selector, 0) for text, selectors in queries for selector in selectors)
+
+    # On indexed trees, skip subtrees that contain none of the final types.
+    index = getattr(root, 'treeIndex', None)
+    mask = None
+    if index is not None and all(x.compounds[-1].pythonObjectTypeName is not None for _, selectors in queries for x in selectors):
+        mask = index.typeMask(x.compounds[-1].pythonObjectTypeName for _, selectors in queries for x in selectors)
+
+    stack = [(x, initial, ()) for x in reversed(_regionChildren(root))]
+    while len(stack) > 0:
+        node, descendantStates, childStates = stack.pop()
+        if mask is not None and not index.subtreeContainsAnyType(node, mask):
+            continue
+        newDescendantStates = []
+        newChildStates = []
+        for states in (descendantStates, childStates):
+            for state in states:
+                text, selector, i = state
+                if not selector.compounds[i].matches(node):
+                    continue
+                if i + 1 == len(selector.compounds):
+                    if id(node) not in resultSets[text]:
+                        resultSets[text].add(id(node))
+                        results[text].append(node)
+                elif selector.combinators[i + 1] == CHILD:
+                    newChildStates.append((text, selector, i + 1))
+                elif (text, selector, i + 1) not in descendantStates:
+                    newDescendantStates.append((text, selector, i + 1))
+        passedDown = descendantStates + tuple(newDescendantStates) if newDescendantStates else descendantStates
+        passedChild = tuple(newChildStates)
+        stack.extend((x, passedDown, passedChild) for x in reversed(_regionChildren(node)))
+    return results
+
+
+def querySelectorsAll(root: UITreeNodeWithDisplayRegion, selectorTexts: Iterable[str]) -> Dict[str, List[UITreeNodeWithDisplayRegion]]:
+    # Matches among the descendants of root, per selector text, in one walk.
+    selectorTexts = list(dict.fromkeys(selectorTexts))
+    index = getattr(root, 'treeIndex', None)
+    if index is None:
+        return _runSelectors(root, selectorTexts)
+    cache = index.queryCache
+    missing = [x for x in selectorTexts if (x, root.position) not in cache]
+    if len(missing) > 0:
+        for text, result in _runSelectors(root, missing).items():
+            cache[(text, root.position)] = result
+    return {x: list(cache[(x, root.position)]) for x in selectorTexts}
+
+
+def querySelectorAll(root: UITreeNodeWithDisplayRegion, selectorText: str) -> List[UITreeNodeWithDisplayRegion]:
+    return querySelectorsAll(root, [selectorText])[selectorText]
+
+
+def querySelector(root: UITreeNodeWithDisplayRegion, selectorText: str) -> Optional[UITreeNodeWithDisplayRegion]:
+    result = querySelectorAll(root, selectorText)
+    return result[0] if len(result) > 0 else None
@@ -0,0 +1,188 @@
+from bisect import bisect_left
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple
+
+from classes import UITreeNode, computeSubtreeHashes, dictEntriesProjection
+
+# Differences between two UITreeNode trees, usually consecutive frames of
+#  one client. Nodes are matched by pythonObjectAddress and type name, and
+#  matched pairs with equal subtree hashes (see computeSubtreeHashes) are
+#  skipped without looking at their descendants, so the cost follows the
+#  size of the change rather than the size of the tree. Only the entries in
+#  the projection are compared, as those are what the hashes cover. Both
+#  trees have to be made of UITreeNode, which keeps its hash.
+#
+#  Matching first descends both trees together, pairing children of paired
+#  nodes by address. Whatever is left over on either side is then looked up
+#  by address among the left over old subtrees, which finds nodes that moved
+#  to another parent; the rest are added or removed.
+#
+#  Among matched siblings, the ones on a longest increasing run of old
+#  indices keep their place, so inserting or removing a sibling moves none of
+#  the others; only the siblings that were reordered against it are moved.
+
+
+class UITreeNodeMove(NamedTuple):
+    address: str
+    oldParentAddress: Optional[str]
+    newParentAddress: Optional[str]
+    # Among the children of the parent that are not None.
+    oldIndex: int
+    newIndex: int
+
+
+class UITreeEntryChange(NamedTuple):
+    address: str
+    key: str
+    # None where the entry is missing on that side.
+    oldValue: Any
+    newValue: Any
+
+
+class UITreeDiff(NamedTuple):
+    # Every added and removed node is listed, including the descendants of
+    #  added or removed subtrees.
+    added: List[UITreeNode]
+    removed: List[UITreeNode]
+    moved: List[UITreeNodeMove]
+    changed: List[UITreeEntryChange]
+
+
+def _children(node: UITreeNode) -> List[UITreeNode]:
+    return [x for x in node.children or [] if x is not None]
+
+
+def _subtree(root: UITreeNode) -> List[UITreeNode]:
+    # root and its descendants in pre-order.
+    result = []
+    stack = [root]
+    while len(stack) > 0:
+        x = stack.pop()
+        result.append(x)
+        stack.extend(reversed(_children(x)))
+    return result
+
+
+def _longestIncreasingSubsequence(values: List[int]) -> Set[int]:
+    # Positions in values of one longest strictly increasing subsequence.
+    tails: List[int] = []
+    tailPositions: List[int] = []
+    previous: List[int] = []
+    for i, value in enumerate(values):
+        k = bisect_left(tails, value)
+        if k == len(tails):
+            tails.append(value)
+            tailPositions.append(i)
+        else:
+            tails[k] = value
+            tailPositions[k] = i
+        previous.append(tailPositions[k - 1] if k > 0 else -1)
+    result = set()
+    i = tailPositions[-1] if len(tailPositions) > 0 else -1
+    while i >= 0:
+        result.add(i)
+        i = previous[i]
+    return result
+
+
+def _changedEntries(old: UITreeNode, new: UITreeNode, projection: FrozenSet[str]) -> List[UITreeEntryChange]:
+    oldEntries = old.dictEntriesOfInterest
+    newEntries = new.dictEntriesOfInterest
+    result = []
+    for key in oldEntries.keys() | newEntries.keys():
+        if key not in projection:
+            continue
+        oldValue = oldEntries.get(key)
+        newValue = newEntries.get(key)
+        if oldValue != newValue or (key in oldEntries) != (key in newEntries):
+            result.append(UITreeEntryChange(new.pythonObjectAddress, key, oldValue, newValue))
+    result.sort(key=lambda x: x.key)
+    return result
+
+
+def diffUITrees(old: UITreeNode, new: UITreeNode, projection: Optional[FrozenSet[str]] = None) -> UITreeDiff:
+    if projection is None:
+        projection = dictEntriesProjection()
+    # Leaves the hash on every node, see computeSubtreeHashes.
+    computeSubtreeHashes(old, projection)
+    computeSubtreeHashes(new, projection)
+    added: List[UITreeNode] = []
+    moved: List[UITreeNodeMove] = []
+    changed: List[UITreeEntryChange] = []
+    # Subtrees without a partner after the paired descent, with the parent
+    #  address and index they had.
+    leftOverOld: List[Tuple[UITreeNode, Optional[str], int]] = []
+    leftOverNew: List[Tuple[UITreeNode, Optional[str], int]] = []
+    # Old nodes of the left over subtrees by address, and the ones found again.
+    oldByAddress: Dict[str, Tuple[UITreeNode, Optional[str], int]] = {}
+    claimed: Set[str] = set()
+
+    def descend(oldRoot: UITreeNode, newRoot: UITreeNode, inLeftOver: bool):
+        # With inLeftOver, the old side belongs to the left over subtrees, so
+        #  its nodes are in oldByAddress and have to be claimed when matched.
+        stack = [(oldRoot, newRoot)]
+        while len(stack) > 0:
+            o, n = stack.pop()
+            if inLeftOver:
+                claimed.add(o.pythonObjectAddress)
+            if o._subtreeHash[1] == n._subtreeHash[1]:
+                if inLeftOver:
+                    claimed.update(x.pythonObjectAddress for x in _subtree(o)[1:])
+                continue
+            changed.extend(_changedEntries(o, n, projection))
+            oldChildren = _children(o)
+            oldChildByAddress: Dict[Tuple[str, str], Tuple[int, UITreeNode]] = {}
+            for i, x in enumerate(oldChildren):
+                oldChildByAddress.setdefault((x.pythonObjectAddress, x.pythonObjectTypeName), (i, x))
+            pairs = []
+            # (old index, new index) of each pair.
+            indices = []
+            for i, x in enumerate(_children(n)):
+                match = oldChildByAddress.pop((x.pythonObjectAddress, x.pythonObjectTypeName), None)
+                if match is None:
+                    leftOverNew.append((x, n.pythonObjectAddress, i))
+                    continue
+                oldIndex, oldChild = match
+                pairs.append((oldChild, x))
+                indices.append((oldIndex, i))
+            inPlace = _longestIncreasingSubsequence([oldIndex for oldIndex, _ in indices])
+            for k, (oldIndex, i) in enumerate(indices):
+                if k not in inPlace:
+                    moved.append(UITreeNodeMove(pairs[k][1].pythonObjectAddress, o.pythonObjectAddress, n.pythonObjectAddress, oldIndex, i))
+            if not inLeftOver:
+                matchedOld = set(id(x) for x, _ in pairs)
+                leftOverOld.extend((x, o.pythonObjectAddress, i) for i, x in enumerate(oldChildren) if id(x) not in matchedOld)
+            stack.extend(reversed(pairs))
+
+    if old.pythonObjectAddress == new.pythonObjectAddress and old.pythonObjectTypeName == new.pythonObjectTypeName:
+        descend(old, new, False)
+    else:
+        leftOverOld.append((old, None, 0))
+        leftOverNew.append((new, None, 0))
+
+    for root, parentAddress, index in leftOverOld:
+        stack = [(root, parentAddress, index)]
+        while len(stack) > 0:
+            x, parentAddress, index = stack.pop()
+            oldByAddress.setdefault(x.pythonObjectAddress, (x, parentAddress, index))
+            stack.extend((child, x.pythonObjectAddress, i) for i, child in reversed(list(enumerate(_children(x)))))
+
+    stack = list(reversed(leftOverNew))
+    while len(stack) > 0:
+        x, parentAddress, index = stack.pop()
+        address = x.pythonObjectAddress
+        match = oldByAddress.get(address) if address not in claimed else None
+        if match is not None and match[0].pythonObjectTypeName == x.pythonObjectTypeName:
+            o, oldParentAddress, oldIndex = match
+            if oldParentAddress != parentAddress or oldIndex != index:
+                moved.append(UITreeNodeMove(address, oldParentAddress, parentAddress, oldIndex, index))
+            count = len(leftOverNew)
+            descend(o, x, True)
+            # Children of x without a partner below o are searched for again.
+            stack.extend(reversed(leftOverNew[count:]))
+            continue
+        added.append(x)
+        stack.extend((child, address, i) for i, child in reversed(list(enumerate(_children(x)))))
+
+    removed = [x for root, _, _ in leftOverOld for x in _subtree(root) if x.pythonObjectAddress not in claimed]
+    return UITreeDiff(added, removed, moved, changed)
+
@@ -0,0 +1,189 @@
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from classes import UITreeNodeWithDisplayRegion
+
+# The display region nodes of one frame, flattened in pre-order while the
+#  display region pass runs. Every node records its position, and the
+#  descendants of the node at position i are exactly the nodes at i + 1 up to
+#  subtreeEnd[i], so listing them is a single slice instead of a tree walk.
+#  Positions are also grouped by pythonObjectTypeName, '_name' (as is and
+#  lowercased) and '_hint', so the nodes with one of those values inside a
+#  subtree are found with a dict lookup and two bisections over the group.
+#  The display texts are kept in document order next to their positions, so
+#  the texts contained in a subtree are one slice of that list.
+#  Addresses map to positions and parent positions are kept, so a node is
+#  found by its pythonObjectAddress with one dict lookup and its ancestors
+#  are walked upwards in O(depth).
+#  Each position also carries a bit mask of the type ids found in its subtree,
+#  so searches for given types can skip whole branches that lack them.
+#  The index describes the tree as built; it is not updated if children are
+#  replaced afterwards.
+
+NO_POSITION = -1
+
+
+def _addToGroup(groups: Dict[Any, List[int]], key: Any, position: int):
+    positions = groups.get(key)
+    if positions is None:
+        groups[key] = [position]
+    else:
+        positions.append(position)
+
+
+class UITreeIndex(object):
+    __slots__ = ('nodes', 'parent', 'subtreeEnd', 'typeNames', 'names',
+                 'lowerNames', 'hints', 'hinted', 'typeIds', 'subtreeTypes',
+                 'queryCache', 'textPositions', 'texts', 'addresses')
+
+    def __init__(self):
+        self.nodes: List[UITreeNodeWithDisplayRegion] = []
+        self.parent = array('i')
+        self.subtreeEnd = array('i')
+        # Value -> positions in ascending order.
+        self.typeNames: Dict[str, List[int]] = {}
+        self.names: Dict[str, List[int]] = {}
+        self.lowerNames: Dict[str, List[int]] = {}
+        self.hints: Dict[str, List[int]] = {}
+        # Positions of all nodes with a '_hint'.
+        self.hinted: List[int] = []
+        # Type name -> bit in subtreeTypes, in order of first appearance.
+        self.typeIds: Dict[str, int] = {}
+        self.subtreeTypes: List[int] = []
+        # Positions of the nodes with a display text, and the texts.
+        self.textPositions: List[int] = []
+        self.texts: List[Any] = []
+        # pythonObjectAddress -> position, the first node wins on duplicates.
+        self.addresses: Dict[str, int] = {}
+        # (selector text, position of the query root) -> matches, see uiselector.
+        self.queryCache: Dict[Any, List[UITreeNodeWithDisplayRegion]] = {}
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def add(self, node: UITreeNodeWithDisplayRegion, parentPosition: int) -> int:
+        # Nodes have to be added in pre-order.
+        position = len(self.nodes)
+        node.treeIndex = self
+        node.position = position
+        self.nodes.append(node)
+        self.parent.append(parentPosition)
+        self.subtreeEnd.append(position + 1)
+        uiNode = node.uiNode
+        self.addresses.setdefault(uiNode.pythonObjectAddress, position)
+        _addToGroup(self.typeNames, uiNode.pythonObjectTypeName, position)
+        typeId = self.typeIds.get(uiNode.pythonObjectTypeName)
+        if typeId is None:
+            typeId = self.typeIds[uiNode.pythonObjectTypeName] = len(self.typeIds)
+        self.subtreeTypes.append(1 << typeId)
+        entries = uiNode.dictEntriesOfInterest
+        name = entries.get('_name')
+        if type(name) is str:
+            _addToGroup(self.names, name, position)
+            _addToGroup(self.lowerNames, name.lower(), position)
+        hint = entries.get('_hint')
+        if type(hint) is str:
+            _addToGroup(self.hints, hint, position)
+            self.hinted.append(position)
+        # Same precedence as getDisplayText.
+        text = entries.get('_setText')
+        if text is None:
+            text = entries.get('_text')
+        if text is not None:
+            self.textPositions.append(position)
+            self.texts.append(text)
+        return position
+
+    def close(self):
+        # Positions are in pre-order, so walking backwards closes every subtree
+        #  before its parent is visited.
+        parent = self.parent
+        subtreeEnd = self.subtreeEnd
+        subtreeTypes = self.subtreeTypes
+        for position in range(len(self.nodes) - 1, 0, -1):
+            parentPosition = parent[position]
+            if subtreeEnd[position] > subtreeEnd[parentPosition]:
+                subtreeEnd[parentPosition] = subtreeEnd[position]
+            subtreeTypes[parentPosition] |= subtreeTypes[position]
+
+    def descendants(self, node: UITreeNodeWithDisplayRegion) -> List[UITreeNodeWithDisplayRegion]:
+        return self.nodes[node.position + 1:self.subtreeEnd[node.position]]
+
+    def parentOf(self, node: UITreeNodeWithDisplayRegion) -> Optional[UITreeNodeWithDisplayRegion]:
+        parentPosition = self.parent[node.position]
+        return None if parentPosition == NO_POSITION else self.nodes[parentPosition]
+
+    def ancestors(self, node: UITreeNodeWithDisplayRegion) -> Iterator[UITreeNodeWithDisplayRegion]:
+        # Nearest first, ending with the root.
+        parent = self.parent
+        position = parent[node.position]
+        while position != NO_POSITION:
+            yield self.nodes[position]
+            position = parent[position]
+
+    def nodeWithAddress(self, address: str, node: Optional[UITreeNodeWithDisplayRegion] = None) -> Optional[UITreeNodeWithDisplayRegion]:
+        # Restricted to node and its descendants when one is given.
+        position = self.addresses.get(address)
+        if position is None:
+            return None
+        if node is not None and not node.position <= position < self.subtreeEnd[node.position]:
+            return None
+        return self.nodes[position]
+
+    def textRange(self, node: UITreeNodeWithDisplayRegion) -> Tuple[int, int]:
+        # Range of self.texts and self.textPositions covering node and its
+        #  descendants.
+        start = bisect_left(self.textPositions, node.position)
+        return start, bisect_left(self.textPositions, self.subtreeEnd[node.position], start)
+
+    def containedTexts(self, node: UITreeNodeWithDisplayRegion) -> List[Any]:
+        start, end = self.textRange(node)
+        return self.texts[start:end]
+
+    def typeMask(self, pythonObjectTypeNames: Iterable[str]) -> int:
+        # Types that do not occur in the frame contribute no bit.
+        mask = 0
+        for x in pythonObjectTypeNames:
+            typeId = self.typeIds.get(x)
+            if typeId is not None:
+                mask |= 1 << typeId
+        return mask
+
+    def subtreeContainsAnyType(self, node: UITreeNodeWithDisplayRegion, mask: int) -> bool:
+        # Including node itself.
+        return self.subtreeTypes[node.position] & mask != 0
+
+    def inSubtree(self, positions: Optional[List[int]], node: Optional[UITreeNodeWithDisplayRegion] = None) -> List[UITreeNodeWithDisplayRegion]:
+        # The nodes at the given ascending positions, restricted to the
+        #  descendants of node when one is given, in document order.
+        if not positions:
+            return []
+        nodes = self.nodes
+        if node is None:
+            return [nodes[x] for x in positions]
+        start = bisect_left(positions, node.position + 1)
+        end = bisect_left(positions, self.subtreeEnd[node.position], start)
+        return [nodes[positions[x]] for x in range(start, end)]
+
+    def descendantsOfType(self, pythonObjectTypeName: str, node: Optional[UITreeNodeWithDisplayRegion] = None) -> List[UITreeNodeWithDisplayRegion]:
+        return self.inSubtree(self.typeNames.get(pythonObjectTypeName), node)
+
+    def descendantsWithName(self, name: str, node: Optional[UITreeNodeWithDisplayRegion] = None, ignoreCase: bool = False) -> List[UITreeNodeWithDisplayRegion]:
+        if ignoreCase:
+            return self.inSubtree(self.lowerNames.get(name.lower()), node)
+        return self.inSubtree(self.names.get(name), node)
+
+    def descendantsWithNameContaining(self, text: str, node: Optional[UITreeNodeWithDisplayRegion] = None) -> List[UITreeNodeWithDisplayRegion]:
+        # Case insensitive. Scans the distinct names, not the nodes.
+        text = text.lower()
+        groups = [positions for name, positions in self.lowerNames.items() if text in name]
+        if len(groups) == 1:
+            return self.inSubtree(groups[0], node)
+        return self.inSubtree(sorted(x for positions in groups for x in positions), node)
+
+    def descendantsWithHint(self, hint: Optional[str] = None, node: Optional[UITreeNodeWithDisplayRegion] = None) -> List[UITreeNodeWithDisplayRegion]:
+        # Without a hint, all nodes that have one.
+        if hint is None:
+            return self.inSubtree(self.hinted, node)
+        return self.inSubtree(self.hints.get(hint), node)
@@ -0,0 +1,186 @@
+from array import array
+from typing import Any, Dict, List, Optional
+
+from classes import DisplayRegion, UITreeNode, displayRegionFromUITreeNode
+
+# A whole UI tree snapshot stored as parallel columns, one row per node in
+#  pre-order. The descendants of row i are exactly the rows i + 1 up to
+#  subtreeEnd[i], so descendant listings are index range scans.
+#  UITreeStoreNode and UITreeStoreNodeWithDisplayRegion are light views over
+#  a row and can stand in for UITreeNode / UITreeNodeWithDisplayRegion.
+
+NO_ROW = -1
+
+
+class UITreeStore(object):
+    __slots__ = ('parent', 'firstChild', 'nextSibling', 'subtreeEnd', 'typeNameId',
+                 'childrenIsNone', 'region', 'totalOffset', 'typeNames',
+                 'addresses', 'dictEntries')
+
+    def __init__(self):
+        self.parent = array('i')
+        self.firstChild = array('i')
+        self.nextSibling = array('i')
+        self.subtreeEnd = array('i')
+        self.typeNameId = array('i')
+        self.childrenIsNone = bytearray()
+        # x, y, width, height of the node itself, four values per row.
+        self.region = array('i')
+        # x, y of the total display region, two values per row.
+        self.totalOffset = array('i')
+        self.typeNames: List[str] = []
+        self.addresses: List[str] = []
+        self.dictEntries: List[Dict[str, Any]] = []
+
+    @staticmethod
+    def fromUITreeNode(uiTree: UITreeNode) -> 'UITreeStore':
+        store = UITreeStore()
+        typeNameIds: Dict[str, int] = {}
+        # Stack of (node, parent row); lastChildOf links up the siblings.
+        stack = [(uiTree, NO_ROW)]
+        lastChildOf: List[int] = []
+        while len(stack) > 0:
+            node, parentRow = stack.pop()
+            row = len(store.addresses)
+            typeName = node.pythonObjectTypeName
+            typeId = typeNameIds.get(typeName)
+            if typeId is None:
+                typeId = typeNameIds[typeName] = len(store.typeNames)
+                store.typeNames.append(typeName)
+            region = displayRegionFromUITreeNode(node)
+            values = [region.x or 0, region.y or 0, region.width or 0, region.height or 0]
+            if parentRow == NO_ROW:
+                offsetX, offsetY = values[0], values[1]
+            else:
+                offsetX = values[0] + store.totalOffset[parentRow * 2]
+                offsetY = values[1] + store.totalOffset[parentRow * 2 + 1]
+
+            store.parent.append(parentRow)
+            store.firstChild.append(NO_ROW)
+            store.nextSibling.append(NO_ROW)
+            store.subtreeEnd.append(row + 1)
+            store.typeNameId.append(typeId)
+            store.childrenIsNone.append(node.children is None)
+            store.region.extend(values)
+            store.totalOffset.extend((offsetX, offsetY))
+            store.addresses.append(node.pythonObjectAddress)
+            store.dictEntries.append(node.dictEntriesOfInterest)
+            lastChildOf.append(NO_ROW)
+
+            if parentRow != NO_ROW:
+                previousSibling = lastChildOf[parentRow]
+                if previousSibling == NO_ROW:
+                    store.firstChild[parentRow] = row
+                else:
+                    store.nextSibling[previousSibling] = row
+                lastChildOf[parentRow] = row
+
+            children = [x for x in (node.children or []) if x is not None]
+            for child in reversed(children):
+                stack.append((child, row))
+
+        # Rows are in pre-order, so walking backwards closes every subtree
+        #  before its parent is visited.
+        for row in range(len(store.addresses) - 1, 0, -1):
+            parentRow = store.parent[row]
+            if store.subtreeEnd[row] > store.subtreeEnd[parentRow]:
+                store.subtreeEnd[parentRow] = store.subtreeEnd[row]
+        return store
+
+    def __len__(self) -> int:
+        return len(self.addresses)
+
+    def root(self) -> 'UITreeStoreNode':
+        return UITreeStoreNode(self, 0)
+
+    def rootWithDisplayRegion(self) -> 'UITreeStoreNodeWithDisplayRegion':
+        return UITreeStoreNodeWithDisplayRegion(self, 0)
+
+    def childRows(self, row: int) -> List[int]:
+        result = []
+        child = self.firstChild[row]
+        while child != NO_ROW:
+            result.append(child)
+            child = self.nextSibling[child]
+        return result
+
+    def rowsOfType(self, pythonObjectTypeName: str, row: int = 0) -> List[int]:
+        if pythonObjectTypeName not in self.typeNames:
+            return []
+        typeId = self.typeNames.index(pythonObjectTypeName)
+        column = self.typeNameId
+        return [i for i in range(row + 1, self.subtreeEnd[row]) if column[i] == typeId]
+
+
+class UITreeStoreNode(object):
+    __slots__ = ('store', 'row')
+
+    def __init__(self, store: UITreeStore, row: int):
+        self.store = store
+        self.row = row
+
+    def __eq__(self, other) -> bool:
+        return type(other) is UITreeStoreNode and other.store is self.store and other.row == self.row
+
+    def __hash__(self) -> int:
+        return hash((id(self.store), self.row))
+
+    @property
+    def pythonObjectAddress(self) -> str:
+        return self.store.addresses[self.row]
+
+    @property
+    def pythonObjectTypeName(self) -> str:
+        return self.store.typeNames[self.store.typeNameId[self.row]]
+
+    @property
+    def dictEntriesOfInterest(self) -> Dict[str, Any]:
+        return self.store.dictEntries[self.row]
+
+    @property
+    def children(self) -> Optional[List['UITreeStoreNode']]:
+        if self.store.childrenIsNone[self.row]:
+            return None
+        return [UITreeStoreNode(self.store, x) for x in self.store.childRows(self.row)]
+
+    def listDescendants(self) -> List['UITreeStoreNode']:
+        store = self.store
+        return [UITreeStoreNode(store, x) for x in range(self.row + 1, store.subtreeEnd[self.row])]
+
+
+class UITreeStoreNodeWithDisplayRegion(object):
+    __slots__ = ('store', 'row')
+
+    def __init__(self, store: UITreeStore, row: int):
+        self.store = store
+        self.row = row
+
+    def __eq__(self, other) -> bool:
+        return type(other) is UITreeStoreNodeWithDisplayRegion and other.store is self.store and other.row == self.row
+
+    def __hash__(self) -> int:
+        return hash((id(self.store), self.row))
+
+    @property
+    def uiNode(self) -> UITreeStoreNode:
+        return UITreeStoreNode(self.store, self.row)
+
+    @property
+    def children(self) -> Optional[List['UITreeStoreNodeWithDisplayRegion']]:
+        if self.store.childrenIsNone[self.row]:
+            return None
+        return [UITreeStoreNodeWithDisplayRegion(self.store, x) for x in self.store.childRows(self.row)]
+
+    @property
+    def selfDisplayRegion(self) -> DisplayRegion:
+        x, y, width, height = self.store.region[self.row * 4:self.row * 4 + 4]
+        return DisplayRegion(x=x, y=y, width=width, height=height)
+
+    @property
+    def totalDisplayRegion(self) -> DisplayRegion:
+        x, y = self.store.totalOffset[self.row * 2:self.row * 2 + 2]
+        return DisplayRegion(x=x, y=y, width=self.store.region[self.row * 4 + 2], height=self.store.region[self.row * 4 + 3])
+
+    def listDescendants(self) -> List['UITreeStoreNodeWithDisplayRegion']:
+        store = self.store
+        return [UITreeStoreNodeWithDisplayRegion(store, x) for x in range(self.row + 1, store.subtreeEnd[self.row])]